@@ -0,0 +1,59 @@
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dags"))
+
+from book_parser import PARSER, parse_books, parse_books_reference  # noqa: E402
+from make_fixtures import write_fixtures  # noqa: E402
+
+# Compares the targeted parser against the original html.parser version.
+#   python benchmarks/bench_parser.py --fixtures saved_pages
+# Without --fixtures, synthetic pages are generated.
+
+
+def pages_per_second(parse, pages, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for content in pages:
+            parse(content)
+    return len(pages) * rounds / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", help="directory of saved page_*.html files")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    directory = args.fixtures
+    if not directory:
+        directory = tempfile.mkdtemp()
+        write_fixtures(directory, pages=10)
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, "rb") as f:
+            pages.append(f.read())
+    if not pages:
+        sys.exit(f"No .html fixtures in {directory}")
+
+    mismatches = [i for i, content in enumerate(pages) if parse_books(content) != parse_books_reference(content)]
+    if mismatches:
+        sys.exit(f"Output differs from the reference parser on fixtures {mismatches}")
+
+    print({
+        "fixtures": len(pages),
+        "books": sum(len(parse_books(content)) for content in pages),
+        "reference_pages_per_s": round(pages_per_second(parse_books_reference, pages, args.rounds), 1),
+        "targeted_pages_per_s": round(pages_per_second(parse_books, pages, args.rounds), 1),
+        "parser": PARSER,
+        "outputs_match": True,
+    })
+
+
+if __name__ == "__main__":
+    main()
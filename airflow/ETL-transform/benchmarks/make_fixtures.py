@@ -0,0 +1,49 @@
+import argparse
+import os
+import random
+
+# Writes synthetic search result pages (page_1.html, page_2.html, ...) shaped like
+# Amazon's markup, for the parser benchmark and serve_pages.py. Saved real pages
+# can be dropped into the same directory instead.
+
+FILLER = "<div class='a-section filler'><span>sponsored</span><a href='#'>link</a></div>" * 40
+
+
+def make_item(rng, n):
+    if rng.random() < 0.1:
+        # incomplete result (no price), skipped by the parser
+        return f"<div class='s-result-item s-asin'><span class='a-size-medium a-text-normal'>Ad {n}</span></div>"
+    return (
+        "<div class='s-result-item s-asin' data-component-type='s-search-result'>"
+        "<div class='a-section'><h2><a class='a-link-normal'>"
+        f"<span class='a-size-medium a-color-base a-text-normal'> Data Engineering Book {n} </span></a></h2>"
+        f"<div class='a-row'><span>by </span><a class='a-size-base a-link-normal'>Author {n % 97}</a></div>"
+        f"<span class='a-icon-alt'>{rng.randint(30, 50) / 10} out of 5 stars</span>"
+        f"<span class='a-price'><span class='a-price-whole'>{rng.randint(10, 90)}.</span>"
+        "<span class='a-price-fraction'>99</span></span>"
+        f"{FILLER}</div></div>"
+    )
+
+
+def make_page(page, items_per_page=48, seed=7):
+    rng = random.Random(seed + page)
+    items = "".join(make_item(rng, (page - 1) * items_per_page + i) for i in range(items_per_page))
+    head = "<head><title>Amazon.com : data engineering books</title>" + "<script>var x = 1;</script>" * 50 + "</head>"
+    nav = "<div id='nav'>" + FILLER * 5 + "</div>"
+    return f"<!doctype html><html>{head}<body>{nav}<div class='s-main-slot'>{items}</div>{nav}</body></html>"
+
+
+def write_fixtures(directory, pages, items_per_page=48):
+    os.makedirs(directory, exist_ok=True)
+    for page in range(1, pages + 1):
+        with open(os.path.join(directory, f"page_{page}.html"), "w") as f:
+            f.write(make_page(page, items_per_page))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--items-per-page", type=int, default=48)
+    args = parser.parse_args()
+    write_fixtures(args.out, args.pages, args.items_per_page)
@@ -0,0 +1,83 @@
+import argparse
+import hashlib
+import os
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import HTTPServer, ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+
+# Serves saved search result pages so the fetcher can be exercised without Amazon.
+#   python benchmarks/serve_pages.py --pages-dir saved_pages --latency 0.3
+#   AMAZON_BASE_URL="http://localhost:8000/s?k=data+engineering+books"
+# page N is read from <pages-dir>/page_N.html; missing pages return 404.
+# Pages carry ETag and Last-Modified, and a matching If-None-Match (or, without one,
+# an If-Modified-Since no older than the file) gets a bodiless 304, so the fetcher's
+# conditional revalidation (dags/http_cache.py) can be exercised locally.
+
+
+def make_handler(pages_dir, latency):
+    class PageHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so session reuse is visible
+        stats = {"requests": 0, "not_modified": 0, "body_bytes": 0}
+
+        def do_GET(self):
+            query = parse_qs(urlsplit(self.path).query)
+            page = query.get("page", ["1"])[0]
+            path = os.path.join(pages_dir, f"page_{page}.html")
+            time.sleep(latency)
+            if not os.path.exists(path):
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            with open(path, "rb") as f:
+                body = f.read()
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            mtime = int(os.path.getmtime(path))
+            self.stats["requests"] += 1
+            if self.not_modified(etag, mtime):
+                self.stats["not_modified"] += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.stats["body_bytes"] += len(body)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", formatdate(mtime, usegmt=True))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def not_modified(self, etag, mtime):
+            if_none_match = self.headers.get("If-None-Match")
+            if if_none_match:
+                return if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+            if_modified_since = self.headers.get("If-Modified-Since")
+            if if_modified_since:
+                try:
+                    return mtime <= parsedate_to_datetime(if_modified_since).timestamp()
+                except (TypeError, ValueError):
+                    return False
+            return False
+
+        def log_message(self, format, *args):
+            pass
+
+    return PageHandler
+
+
+def serve(pages_dir, port=8000, latency=0.0, threaded=True):
+    server_class = ThreadingHTTPServer if threaded else HTTPServer
+    return server_class(("127.0.0.1", port), make_handler(pages_dir, latency))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages-dir", required=True)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+    print(f"Serving {args.pages_dir} on http://127.0.0.1:{args.port}/s?k=data+engineering+books")
+    serve(args.pages_dir, args.port, args.latency).serve_forever()
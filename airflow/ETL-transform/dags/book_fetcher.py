@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Fetches search result pages concurrently over one pooled keep-alive session.
+# AMAZON_BASE_URL can point at a local server (benchmarks/serve_pages.py) for testing.
+
+BASE_URL = os.getenv("AMAZON_BASE_URL", "https://www.amazon.com/s?k=data+engineering+books")
+FETCH_WORKERS = int(os.getenv("AMAZON_FETCH_WORKERS", "4"))  # pages in flight at once
+REQUESTS_PER_SECOND = float(os.getenv("AMAZON_REQUESTS_PER_SECOND", "2"))  # per host
+# optional cap on pages per run; unset keeps going until the caller has enough books
+MAX_PAGES = int(os.environ["AMAZON_MAX_PAGES"]) if os.getenv("AMAZON_MAX_PAGES") else None
+REQUEST_TIMEOUT = int(os.getenv("AMAZON_REQUEST_TIMEOUT", "30"))
+
+
+class HostRateLimiter:
+    # spaces out requests to the same host so concurrency doesn't turn into a burst
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def make_session(headers, pool_size=FETCH_WORKERS):
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def page_url(base_url, page):
+    return f"{base_url}&page={page}"
+
+
+def fetch_pages(session, base_url=BASE_URL, max_pages=MAX_PAGES, workers=FETCH_WORKERS,
+                limiter=None, cache=None):
+    # yields (page, response) in page order while the next `workers` pages are
+    # already being downloaded. Stopping the loop early cancels what hasn't started;
+    # closing the generator waits for pages already downloading to finish.
+    # With max_pages=None pages keep coming until the caller stops.
+    # With an http_cache.HTTPCache, fresh pages skip the network (and the rate limit).
+    limiter = limiter or HostRateLimiter(REQUESTS_PER_SECOND)
+
+    def fetch(page):
+        url = page_url(base_url, page)
+        if cache:
+            return cache.get(session, url, timeout=REQUEST_TIMEOUT, before_request=lambda: limiter.wait(url))
+        limiter.wait(url)
+        return session.get(url, timeout=REQUEST_TIMEOUT)
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    in_flight = deque()
+    next_page = 1
+    def more_pages():
+        return max_pages is None or next_page <= max_pages
+
+    try:
+        while in_flight or more_pages():
+            while more_pages() and len(in_flight) < workers:
+                in_flight.append((next_page, pool.submit(fetch, next_page)))
+                next_page += 1
+            page, future = in_flight.popleft()
+            yield page, future.result()
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+        pool.shutdown(wait=True)
@@ -0,0 +1,162 @@
+import csv
+import io
+import time
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+# Loads book rows over one connection in one transaction: COPY FROM STDIN first,
+# multi-row INSERT via execute_values if the server or a pooler refuses COPY.
+# upsert_books keys rows on a hash of the normalized title so re-runs only write
+# books that are new or changed.
+
+BOOK_COLUMNS = ("title", "authors", "price", "rating")
+
+# computed in SQL on both sides so existing rows and new ones always agree
+TITLE_HASH_SQL = "md5(lower(regexp_replace(btrim({column}), '\\s+', ' ', 'g')))"
+
+
+def books_ddl(table="books"):
+    # idempotent: creates the table, or migrates an old one (backfill, drop duplicates, unique index)
+    title_hash = TITLE_HASH_SQL.format(column="title")
+    return f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+        id SERIAL PRIMARY KEY,
+        title TEXT NOT NULL,
+        authors TEXT,
+        price TEXT,
+        rating TEXT
+    );
+    ALTER TABLE {table} ADD COLUMN IF NOT EXISTS title_hash TEXT;
+    ALTER TABLE {table} ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+    UPDATE {table} SET title_hash = {title_hash} WHERE title_hash IS NULL;
+    DELETE FROM {table} a USING {table} b
+    WHERE a.title_hash = b.title_hash AND a.id < b.id;
+    ALTER TABLE {table} ALTER COLUMN title_hash SET NOT NULL;
+    CREATE UNIQUE INDEX IF NOT EXISTS {table}_title_hash_key ON {table} (title_hash);
+    """
+
+
+class RowsFile(io.TextIOBase):
+    # file-like view over row tuples so COPY streams them without building one big string
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.buffer = ""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            chunk = io.StringIO()
+            writer = csv.writer(chunk)
+            for row in self._take(1000):
+                writer.writerow(row)
+            if not chunk.getvalue():
+                break
+            self.buffer += chunk.getvalue()
+        if size < 0:
+            data, self.buffer = self.buffer, ""
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def _take(self, count):
+        for _ in range(count):
+            try:
+                yield next(self.rows)
+            except StopIteration:
+                return
+
+
+def copy_books(cur, rows, table="books"):
+    cur.copy_expert(
+        f"COPY {table} ({', '.join(BOOK_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+        RowsFile(rows),
+    )
+
+
+def insert_books(cur, rows, table="books", page_size=1000):
+    execute_values(
+        cur,
+        f"INSERT INTO {table} ({', '.join(BOOK_COLUMNS)}) VALUES %s",
+        rows,
+        page_size=page_size,
+    )
+
+
+def load_books(conn, rows, table="books"):
+    # returns (method, rows, rows_per_s); everything commits or nothing does
+    rows = list(rows)
+    start = time.perf_counter()
+    method = "copy"
+    try:
+        with conn.cursor() as cur:
+            copy_books(cur, rows, table)
+    except psycopg2.Error as e:
+        print(f"COPY failed ({e}), falling back to execute_values")
+        conn.rollback()
+        method = "execute_values"
+        with conn.cursor() as cur:
+            insert_books(cur, rows, table)
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    return method, len(rows), round(len(rows) / elapsed) if elapsed else None
+
+
+def upsert_books(conn, rows, table="books", prune=False):
+    # rows go to a temp table first, then one INSERT ... ON CONFLICT writes only new or
+    # changed books. prune=True also deletes books missing from this batch, so the table
+    # mirrors the latest scrape. Returns a dict of counts.
+    rows = list(rows)
+    stage = f"{table}_stage"
+    title_hash = TITLE_HASH_SQL.format(column="title")
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE TEMP TABLE {stage} (title TEXT, authors TEXT, price TEXT, rating TEXT) ON COMMIT DROP")
+        cur.execute("SAVEPOINT stage_copy")
+        try:
+            copy_books(cur, rows, stage)
+        except psycopg2.Error as e:
+            print(f"COPY failed ({e}), falling back to execute_values")
+            cur.execute("ROLLBACK TO SAVEPOINT stage_copy")
+            insert_books(cur, rows, stage)
+
+        # DISTINCT ON: a batch may hold the same title twice and ON CONFLICT can't touch a row twice
+        cur.execute(f"""
+            INSERT INTO {table} AS t (title, authors, price, rating, title_hash)
+            SELECT DISTINCT ON ({title_hash}) title, authors, price, rating, {title_hash}
+            FROM {stage}
+            ORDER BY {title_hash}
+            ON CONFLICT (title_hash) DO UPDATE
+            SET title = EXCLUDED.title,
+                authors = EXCLUDED.authors,
+                price = EXCLUDED.price,
+                rating = EXCLUDED.rating,
+                updated_at = now()
+            WHERE (t.title, t.authors, t.price, t.rating)
+                IS DISTINCT FROM (EXCLUDED.title, EXCLUDED.authors, EXCLUDED.price, EXCLUDED.rating)
+            RETURNING (xmax = 0)
+        """)
+        written = [inserted for (inserted,) in cur.fetchall()]
+
+        pruned = 0
+        if prune:
+            cur.execute(f"""
+                DELETE FROM {table} t
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {stage} s WHERE {TITLE_HASH_SQL.format(column="s.title")} = t.title_hash
+                )
+            """)
+            pruned = cur.rowcount
+    conn.commit()
+
+    inserted = sum(written)
+    return {
+        "rows": len(rows),
+        "inserted": inserted,
+        "updated": len(written) - inserted,
+        "unchanged": len(rows) - len(written),
+        "pruned": pruned,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
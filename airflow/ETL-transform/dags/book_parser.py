@@ -0,0 +1,63 @@
+import logging
+
+import soupsieve as sv
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Pulls title, author, price and rating out of a search result page.
+# Only the result containers are kept while parsing, and the field selectors
+# are compiled once at import instead of on every find() call.
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"  # C-backed, several times faster than html.parser
+except ImportError:
+    # lxml is in requirements.txt and _PIP_ADDITIONAL_REQUIREMENTS, so this means the
+    # image was built without it; parsing still works, just several times slower
+    PARSER = "html.parser"
+    logging.getLogger(__name__).warning(
+        "lxml is not installed; parsing book pages with the much slower html.parser. "
+        "Install requirements.txt into the Airflow image.")
+
+RESULT_ITEMS = SoupStrainer("div", class_="s-result-item")
+TITLE = sv.compile("span.a-text-normal")
+AUTHOR = sv.compile("a.a-size-base")
+PRICE = sv.compile("span.a-price-whole")
+RATING = sv.compile("span.a-icon-alt")
+
+
+def parse_books(content):
+    # returns every complete book on the page in page order; dedup is up to the caller
+    soup = BeautifulSoup(content, PARSER, parse_only=RESULT_ITEMS)
+    books = []
+    for book in soup.find_all("div", class_="s-result-item"):
+        title = TITLE.select_one(book)
+        author = AUTHOR.select_one(book)
+        price = PRICE.select_one(book)
+        rating = RATING.select_one(book)
+        if title and author and price and rating:
+            books.append({
+                "Title": title.text.strip(),
+                "Author": author.text.strip(),
+                "Price": price.text.strip(),
+                "Rating": rating.text.strip(),
+            })
+    return books
+
+
+def parse_books_reference(content):
+    # the original full-tree html.parser version, kept to check parse_books against
+    soup = BeautifulSoup(content, "html.parser")
+    books = []
+    for book in soup.find_all("div", {"class": "s-result-item"}):
+        title = book.find("span", {"class": "a-text-normal"})
+        author = book.find("a", {"class": "a-size-base"})
+        price = book.find("span", {"class": "a-price-whole"})
+        rating = book.find("span", {"class": "a-icon-alt"})
+        if title and author and price and rating:
+            books.append({
+                "Title": title.text.strip(),
+                "Author": author.text.strip(),
+                "Price": price.text.strip(),
+                "Rating": rating.text.strip(),
+            })
+    return books
@@ -1,11 +1,18 @@
+import os
+from contextlib import closing
 from datetime import datetime, timedelta
 from airflow import DAG
-import requests
 import pandas as pd
-from bs4 import BeautifulSoup
 from airflow.operators.python import PythonOperator
 from airflow.providers.postgres.operators.postgres import PostgresOperator
 from airflow.providers.postgres.hooks.postgres import PostgresHook
+from book_fetcher import fetch_pages, make_session
+from book_parser import parse_books
+from http_cache import HTTPCache
+from book_loader import books_ddl, upsert_books
+from xcom_offload import offload_frame, load_offloaded
+
+PRUNE_STALE = os.getenv("BOOKS_PRUNE_STALE", "false").lower() == "true"  # drop books missing from the latest run
 
 #1) fetch amazon data (extract) 2) clean data (transform)
 
@@ -19,53 +26,37 @@ headers = {
 
 
 def get_amazon_data_books(num_books, ti):
-    # Base URL of the Amazon search results for data science books
-    base_url = f"https://www.amazon.com/s?k=data+engineering+books"
-
     books = []
     seen_titles = set()  # To keep track of seen titles
 
-    page = 1
-
-    while len(books) < num_books:
-        url = f"{base_url}&page={page}"
-        
-        # Send a request to the URL
-        response = requests.get(url, headers=headers)
-        
-        # Check if the request was successful
-        if response.status_code == 200:
-            # Parse the content of the request with BeautifulSoup
-            soup = BeautifulSoup(response.content, "html.parser")
-            
-            # Find book containers (you may need to adjust the class names based on the actual HTML structure)
-            book_containers = soup.find_all("div", {"class": "s-result-item"})
-            
-            # Loop through the book containers and extract data
-            for book in book_containers:
-                title = book.find("span", {"class": "a-text-normal"})
-                author = book.find("a", {"class": "a-size-base"})
-                price = book.find("span", {"class": "a-price-whole"})
-                rating = book.find("span", {"class": "a-icon-alt"})
-                
-                if title and author and price and rating:
-                    book_title = title.text.strip()
-                    
+    # Pages are fetched concurrently over one keep-alive session; the loop below
+    # still sees them in page order. Unchanged pages come from the on-disk cache.
+    cache = HTTPCache()
+    try:
+        # closing() joins the fetch threads before the cache they write to is closed
+        with make_session(headers) as session, closing(fetch_pages(session, cache=cache)) as pages:
+            for page, response in pages:
+                # Check if the request was successful
+                if response.status_code != 200:
+                    print(f"Failed to retrieve page {page}")
+                    break
+
+                # Parse only the result containers and pull the four fields out of each
+                for book in cache.parsed(response, parse_books):
                     # Check if title has been seen before
-                    if book_title not in seen_titles:
-                        seen_titles.add(book_title)
-                        books.append({
-                            "Title": book_title,
-                            "Author": author.text.strip(),
-                            "Price": price.text.strip(),
-                            "Rating": rating.text.strip(),
-                        })
-            
-            # Increment the page number for the next iteration
-            page += 1
-        else:
-            print("Failed to retrieve the page")
-            break
+                    if book["Title"] not in seen_titles:
+                        seen_titles.add(book["Title"])
+                        books.append(book)
+
+                # Stop as soon as we have enough unique books; pages not started yet are cancelled
+                if len(books) >= num_books:
+                    break
+            else:
+                # only reached when AMAZON_MAX_PAGES is set and every page was read
+                print(f"Stopped at the AMAZON_MAX_PAGES cap with {len(books)} of {num_books} books")
+        print(f"HTTP cache: {cache.stats}")
+    finally:
+        cache.close()
 
     # Limit to the requested number of books
     books = books[:num_books]
@@ -76,23 +67,29 @@ def get_amazon_data_books(num_books, ti):
     # Remove duplicates based on 'Title' column
     df.drop_duplicates(subset="Title", inplace=True)
     
-    # Push the DataFrame to XCom
-    ti.xcom_push(key='book_data', value=df.to_dict('records'))
+    # Write the DataFrame to the shared data volume and push only a reference to XCom
+    ref = offload_frame(df, f"{ti.dag_id}_{ti.task_id}_{ti.run_id}")
+    ti.xcom_push(key='book_data', value=ref)
 
 #3) create and store data in table on postgres (load)
     
 def insert_book_data_into_postgres(ti):
-    book_data = ti.xcom_pull(key='book_data', task_ids='fetch_book_data')
-    if not book_data:
+    ref = ti.xcom_pull(key='book_data', task_ids='fetch_book_data')
+    if not ref or not ref["rows"]:
         raise ValueError("No book data found")
 
+    # Memory-mapped read of the file written by fetch_book_data
+    book_data = load_offloaded(ref)
+
+    # One connection and one transaction for the whole batch instead of one per book
     postgres_hook = PostgresHook(postgres_conn_id='books_connection')
-    insert_query = """
-    INSERT INTO books (title, authors, price, rating)
-    VALUES (%s, %s, %s, %s)
-    """
-    for book in book_data:
-        postgres_hook.run(insert_query, parameters=(book['Title'], book['Author'], book['Price'], book['Rating']))
+    conn = postgres_hook.get_conn()
+    try:
+        rows = zip(*(book_data.column(name).to_pylist() for name in ('Title', 'Author', 'Price', 'Rating')))
+        # Keyed on the normalized title hash: re-runs only write new or changed books
+        print(f"Upserted books: {upsert_books(conn, rows, prune=PRUNE_STALE)}")
+    finally:
+        conn.close()
 
 
 default_args = {
@@ -124,15 +121,7 @@ fetch_book_data_task = PythonOperator(
 create_table_task = PostgresOperator(
     task_id='create_table',
     postgres_conn_id='books_connection',
-    sql="""
-    CREATE TABLE IF NOT EXISTS books (
-        id SERIAL PRIMARY KEY,
-        title TEXT NOT NULL,
-        authors TEXT,
-        price TEXT,
-        rating TEXT
-    );
-    """,
+    sql=books_ddl("books"),
     dag=dag,
 )
 
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# On-disk response cache for the page fetcher.
+#  - fresh entries (younger than the TTL) are served without touching the network
+#  - stale entries are revalidated with If-None-Match / If-Modified-Since; a 304
+#    reuses the stored body
+#  - once the cache passes its size budget the least recently used entries go
+# Parsed results are cached next to the body so unchanged pages aren't re-parsed.
+
+CACHE_DIR = os.getenv("HTTP_CACHE_DIR", "/opt/airflow/data/http_cache")
+TTL_SECONDS = int(os.getenv("HTTP_CACHE_TTL_SECONDS", str(6 * 3600)))
+MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_MB", "200")) * 1024 * 1024
+
+
+class CachedResponse:
+    def __init__(self, url, status_code, content, cache_key=None, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.cache_key = cache_key
+        self.from_cache = from_cache
+
+
+class HTTPCache:
+    def __init__(self, directory=CACHE_DIR, ttl_seconds=TTL_SECONDS, max_bytes=MAX_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                cache_key TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self.db.commit()
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "evictions": 0, "parse_hits": 0}
+
+    def get(self, session, url, timeout=None, before_request=None):
+        entry = self._lookup(url)
+        now = time.time()
+        if entry and now - entry["fetched_at"] < self.ttl_seconds:
+            content = self._read_body(entry["cache_key"])
+            if content is not None:
+                self._touch(url, now)
+                self._count("hits")
+                return CachedResponse(url, 200, content, entry["cache_key"], True)
+
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        if before_request:
+            before_request()
+        response = session.get(url, headers=headers, timeout=timeout)
+
+        if response.status_code == 304 and entry:
+            content = self._read_body(entry["cache_key"])
+            if content is not None:
+                self._touch(url, time.time(), revalidated=True)
+                self._count("revalidated")
+                return CachedResponse(url, 200, content, entry["cache_key"], True)
+            # body file is gone: fetch again without the validators
+            response = session.get(url, timeout=timeout)
+
+        self._count("misses")
+        if response.status_code != 200:
+            return response
+        cache_key = self._store(url, response)
+        return CachedResponse(url, 200, response.content, cache_key, False)
+
+    def parsed(self, response, parse):
+        # returns parse(response.content), reusing the stored result when the body is unchanged
+        cache_key = getattr(response, "cache_key", None)
+        if not cache_key:
+            return parse(response.content)
+        digest = hashlib.sha256(response.content).hexdigest()
+        path = os.path.join(self.directory, f"{cache_key}.parsed.json")
+        try:
+            with open(path) as f:
+                stored = json.load(f)
+            if stored["sha256"] == digest:
+                self._count("parse_hits")
+                return stored["result"]
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+        result = parse(response.content)
+        self._write_atomic(path, json.dumps({"sha256": digest, "result": result}).encode())
+        return result
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def _lookup(self, url):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT cache_key, etag, last_modified, fetched_at FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"cache_key": row[0], "etag": row[1], "last_modified": row[2], "fetched_at": row[3]}
+
+    def _touch(self, url, now, revalidated=False):
+        with self.lock:
+            if revalidated:
+                self.db.execute("UPDATE entries SET last_access = ?, fetched_at = ? WHERE url = ?", (now, now, url))
+            else:
+                self.db.execute("UPDATE entries SET last_access = ? WHERE url = ?", (now, url))
+            self.db.commit()
+
+    def _store(self, url, response):
+        cache_key = hashlib.sha256(url.encode()).hexdigest()
+        self._write_atomic(self._body_path(cache_key), response.content)
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, cache_key, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                 now, now, len(response.content)),
+            )
+            self.db.commit()
+        self._evict()
+        return cache_key
+
+    def _evict(self):
+        with self.lock:
+            total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for url, cache_key, size in self.db.execute(
+                "SELECT url, cache_key, size FROM entries ORDER BY last_access"
+            ):
+                if total <= self.max_bytes:
+                    break
+                victims.append((url, cache_key))
+                total -= size
+            self.db.executemany("DELETE FROM entries WHERE url = ?", [(url,) for url, _ in victims])
+            self.db.commit()
+            self.stats["evictions"] += len(victims)
+        for _, cache_key in victims:
+            for path in (self._body_path(cache_key), os.path.join(self.directory, f"{cache_key}.parsed.json")):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _read_body(self, cache_key):
+        try:
+            with open(self._body_path(cache_key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _body_path(self, cache_key):
+        return os.path.join(self.directory, f"{cache_key}.body")
+
+    def _write_atomic(self, path, data):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _count(self, name):
+        with self.lock:
+            self.stats[name] += 1
@@ -0,0 +1,61 @@
+import hashlib
+import os
+import re
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Large task outputs go to a file on the shared data volume; only a small
+# reference (path, row count, checksum) travels through XCom.
+
+OFFLOAD_DIR = os.getenv("XCOM_OFFLOAD_DIR", "/opt/airflow/data/xcom")
+OFFLOAD_FORMAT = os.getenv("XCOM_OFFLOAD_FORMAT", "arrow")  # arrow (IPC file) or parquet
+RETENTION_DAYS = int(os.getenv("XCOM_OFFLOAD_RETENTION_DAYS", "7"))
+
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def offload_frame(df, name, fmt=OFFLOAD_FORMAT):
+    os.makedirs(OFFLOAD_DIR, exist_ok=True)
+    prune_old_files()
+
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if fmt == "parquet":
+        path = os.path.join(OFFLOAD_DIR, f"{safe_name}.parquet")
+        pq.write_table(table, path)
+    else:
+        # uncompressed IPC file, so the reader can memory-map it without a decode step
+        path = os.path.join(OFFLOAD_DIR, f"{safe_name}.arrow")
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    return {"path": path, "format": fmt, "rows": table.num_rows, "sha256": file_sha256(path)}
+
+
+def load_offloaded(ref):
+    path = ref["path"]
+    if file_sha256(path) != ref["sha256"]:
+        raise ValueError(f"Checksum mismatch for offloaded XCom file {path}")
+    if ref["format"] == "parquet":
+        table = pq.read_table(path, memory_map=True)
+    else:
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    if table.num_rows != ref["rows"]:
+        raise ValueError(f"Expected {ref['rows']} rows in {path}, found {table.num_rows}")
+    return table
+
+
+def prune_old_files():
+    cutoff = time.time() - RETENTION_DAYS * 86400
+    for entry in os.scandir(OFFLOAD_DIR):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# the DAG modules import each other by bare name, as they do from the dags folder
+sys.path.insert(0, os.path.join(HERE, "..", "dags"))
+sys.path.insert(0, os.path.join(HERE, "..", "benchmarks"))
@@ -0,0 +1,70 @@
+import os
+import uuid
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+from book_loader import books_ddl, upsert_books
+
+# upsert_books relies on ON CONFLICT, temp tables and xmax, so it runs against a real
+# postgres: set BOOKS_PG_DSN (as for benchmarks/bench_loader.py) to enable these tests
+DSN = os.getenv("BOOKS_PG_DSN")
+pytestmark = pytest.mark.skipif(not DSN, reason="BOOKS_PG_DSN is not set")
+
+
+@pytest.fixture
+def books():
+    conn = psycopg2.connect(DSN)
+    table = f"books_test_{uuid.uuid4().hex[:8]}"
+    with conn.cursor() as cur:
+        cur.execute(books_ddl(table))
+    conn.commit()
+    yield conn, table
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.commit()
+    conn.close()
+
+
+def stored(conn, table):
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT title, authors, price, rating FROM {table} ORDER BY title")
+        return cur.fetchall()
+
+
+ROWS = [
+    ("Dune", "Frank Herbert", "$9.99", "4.7 out of 5 stars"),
+    ("Emma", "Jane Austen", "$4.99", "4.5 out of 5 stars"),
+]
+
+
+def test_rerun_only_writes_new_or_changed_books(books):
+    conn, table = books
+    first = upsert_books(conn, ROWS, table)
+    again = upsert_books(conn, ROWS, table)
+    changed = upsert_books(conn, [ROWS[0], ("Emma", "Jane Austen", "$3.99", "4.5 out of 5 stars"),
+                                  ("Ulysses", "James Joyce", "$12.00", "4.0 out of 5 stars")], table)
+
+    assert (first["inserted"], first["updated"], first["unchanged"]) == (2, 0, 0)
+    assert (again["inserted"], again["updated"], again["unchanged"]) == (0, 0, 2)
+    assert (changed["inserted"], changed["updated"], changed["unchanged"]) == (1, 1, 1)
+    assert stored(conn, table)[1] == ("Emma", "Jane Austen", "$3.99", "4.5 out of 5 stars")
+
+
+def test_titles_differing_in_case_or_spacing_are_one_book(books):
+    conn, table = books
+    result = upsert_books(conn, [ROWS[0], ("  dune ", "Frank Herbert", "$8.99", "4.7 out of 5 stars")], table)
+
+    assert result["inserted"] == 1
+    assert len(stored(conn, table)) == 1
+
+
+def test_prune_removes_books_missing_from_the_batch(books):
+    conn, table = books
+    upsert_books(conn, ROWS, table)
+    result = upsert_books(conn, ROWS[:1], table, prune=True)
+
+    assert result["pruned"] == 1
+    assert [title for title, *_ in stored(conn, table)] == ["Dune"]
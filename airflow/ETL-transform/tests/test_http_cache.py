@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+import requests
+
+from http_cache import HTTPCache
+from serve_pages import serve
+
+
+@pytest.fixture
+def server(tmp_path):
+    pages = tmp_path / "pages"
+    pages.mkdir()
+    (pages / "page_1.html").write_text("<html>" + "books " * 1000 + "</html>")
+    server = serve(str(pages), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/s?k=books&page=1"
+
+
+def test_revalidation_reuses_the_cached_body(server, tmp_path):
+    cache = HTTPCache(str(tmp_path / "cache"), ttl_seconds=0)  # every entry is stale at once
+    stats = server.RequestHandlerClass.stats
+    with requests.Session() as session:
+        first = cache.get(session, url(server))
+        second = cache.get(session, url(server))
+    cache.close()
+
+    assert not first.from_cache
+    assert second.from_cache and second.content == first.content
+    assert cache.stats["revalidated"] == 1
+    assert stats == {"requests": 2, "not_modified": 1, "body_bytes": len(first.content)}
+
+
+def test_changed_page_is_downloaded_again(server, tmp_path):
+    cache = HTTPCache(str(tmp_path / "cache"), ttl_seconds=0)
+    with requests.Session() as session:
+        cache.get(session, url(server))
+        (tmp_path / "pages" / "page_1.html").write_text("<html>new books</html>")
+        second = cache.get(session, url(server))
+    cache.close()
+
+    assert not second.from_cache
+    assert second.content == b"<html>new books</html>"
+    assert cache.stats["revalidated"] == 0
+
+
+def test_fresh_entry_skips_the_network(server, tmp_path):
+    cache = HTTPCache(str(tmp_path / "cache"), ttl_seconds=3600)
+    with requests.Session() as session:
+        cache.get(session, url(server))
+        second = cache.get(session, url(server))
+    cache.close()
+
+    assert second.from_cache
+    assert server.RequestHandlerClass.stats["requests"] == 1
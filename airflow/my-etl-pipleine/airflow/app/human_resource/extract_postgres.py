@@ -1,29 +1,128 @@
 import pandas as pd
 import psycopg2
 import os
-from utils.snowflake_uploader import upload_to_snowflake
+from itertools import islice
+from utils.snowflake_uploader import (upload_to_snowflake, upload_batches_to_snowflake, publish_partitions,
+                                      sample_column_types)
+from utils.partitioning import split_range, part_table_name
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def extract_postgres():
-    conn = psycopg2.connect(
+# employees are upserted on employee_id
+TABLE_NAME = "human_resources"
+LOAD_MODE = "merge"
+KEY_COLUMNS = ["employee_id"]
+
+# streaming mode reads through a server-side cursor so memory stays flat
+STREAM = os.getenv("PG_STREAM", "true").lower() == "true"
+ITERSIZE = int(os.getenv("PG_ITERSIZE", "10000"))  # rows per network round trip
+BATCH_ROWS = int(os.getenv("PG_BATCH_ROWS", "100000"))  # rows per DataFrame handed to the uploader
+
+QUERY = """ 
+    select
+        emp.id as employee_id,
+        concat(emp.lastname, ' ', emp.firstname) as full_name,
+        emp.position,
+        emp.department,
+        emp.event_date,
+        emp.salary
+    from public.employees emp
+"""
+
+
+def get_connection():
+    return psycopg2.connect(
         host=os.getenv("PG_HOST"),
         port=os.getenv("PG_PORT"),
         user=os.getenv("PG_USER"),
         password=os.getenv("PG_PASSWORD"),
         dbname=os.getenv("PG_DB")
     )
-    query = """ 
-        select
-            emp.id as employee_id,
-            concat(emp.lastname, ' ', emp.firstname) as full_name,
-            emp.position,
-            emp.department,
-            emp.event_date,
-            emp.salary
-        from public.employees emp
-    """
-    df = pd.read_sql(query, conn)
-    conn.close()
-    upload_to_snowflake(df, "human_resources")
+
+
+def read_batches(conn, query, params=None, batch_rows=None, itersize=None, as_arrow=False):
+    batch_rows = batch_rows or BATCH_ROWS
+    # a named cursor is a server-side cursor: postgres keeps the result set and
+    # psycopg2 pulls it itersize rows at a time instead of buffering everything
+    with conn.cursor(name="extract_stream") as cur:
+        cur.itersize = itersize or ITERSIZE
+        cur.execute(query, params)
+        while True:
+            rows = list(islice(cur, batch_rows))
+            if not rows:
+                break
+            columns = [col[0] for col in cur.description]
+            yield make_batch(rows, columns, as_arrow)
+
+
+def make_batch(rows, columns, as_arrow=False):
+    if as_arrow:
+        import pyarrow as pa
+        return pa.table({col: list(values) for col, values in zip(columns, zip(*rows))})
+    return pd.DataFrame.from_records(rows, columns=columns)
+
+
+def extract_postgres():
+    conn = get_connection()
+    try:
+        if STREAM:
+            upload_batches_to_snowflake(read_batches(conn, QUERY), TABLE_NAME,
+                                        mode=LOAD_MODE, key_columns=KEY_COLUMNS)
+        else:
+            df = pd.read_sql(QUERY, conn)
+            upload_to_snowflake(df, TABLE_NAME, mode=LOAD_MODE, key_columns=KEY_COLUMNS)
+    finally:
+        conn.close()
+
+
+# partitioned mode: plan_partitions -> extract_partition (mapped, parallel) -> publish
+PARTITION_COLUMNS = ("employee_id", "event_date")
+
+
+def plan_partitions(column, count):
+    if column not in PARTITION_COLUMNS:
+        raise ValueError(f"Cannot partition human_resources on {column}")
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"select min(q.{column}), max(q.{column}) from ({QUERY}) q")
+            low, high = cur.fetchone()
+        column_types = source_column_types(conn)
+    finally:
+        conn.close()
+    return [{"column": column, "column_types": column_types, **part} for part in split_range(low, high, count)]
+
+
+def source_column_types(conn):
+    # one shared schema for every partition table, from a non-null value of each column
+    sample = {}
+    with conn.cursor() as cur:
+        cur.execute(f"select * from ({QUERY}) q limit 0")
+        columns = [col[0] for col in cur.description]
+        for col in columns:
+            cur.execute(f"select q.{col} from ({QUERY}) q where q.{col} is not null limit 1")
+            row = cur.fetchone()
+            sample[col] = row[0] if row else None
+    return sample_column_types(sample)
+
+
+def extract_partition(column, index, lower, upper, last, run_id, column_types=None):
+    # run_id comes from the Airflow context and keeps concurrent runs' part tables apart
+    if column not in PARTITION_COLUMNS:
+        raise ValueError(f"Cannot partition human_resources on {column}")
+    upper_op = "<=" if last else "<"
+    query = f"select * from ({QUERY}) q where q.{column} >= %(lower)s and q.{column} {upper_op} %(upper)s"
+    part_table = part_table_name(TABLE_NAME, index, run_id)
+    conn = get_connection()
+    try:
+        rows = upload_batches_to_snowflake(read_batches(conn, query, {"lower": lower, "upper": upper}),
+                                           part_table, mode="replace", column_types=column_types)
+    finally:
+        conn.close()
+    return {"table": part_table if rows else None, "rows": rows}
+
+
+def publish(parts, run_id):
+    publish_partitions(TABLE_NAME, [part["table"] for part in parts if part["table"]],
+                       mode=LOAD_MODE, key_columns=KEY_COLUMNS, run_id=run_id)
@@ -1,24 +1,136 @@
 import pandas as pd
 import sqlite3
-from utils.snowflake_uploader import upload_to_snowflake
+from urllib.request import pathname2url
+from utils.snowflake_uploader import (upload_to_snowflake, upload_batches_to_snowflake, publish_partitions,
+                                      sample_column_types)
+from utils.partitioning import split_range, part_table_name
+from utils.state import load_state, save_state
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
+# one row per employee per payment
+TABLE_NAME = "salarys"
+LOAD_MODE = "merge"
+KEY_COLUMNS = ["employee_id", "payment_date"]
+
+# incremental mode reads only rows with a rowid above the last saved one.
+# main.salary is append-only; a VACUUM on a table without an integer primary
+# key may renumber rowids, so reset the watermark after one.
+INCREMENTAL = os.getenv("SALARY_INCREMENTAL", "true").lower() == "true"
+CHUNK_ROWS = int(os.getenv("SALARY_CHUNK_ROWS", "100000"))
+# immutable=1 skips all locking; only safe when nothing writes the file during the run
+IMMUTABLE = os.getenv("SALARY_DB_IMMUTABLE", "false").lower() == "true"
+WATERMARK_KEY = "salary_rowid"
+
+COLUMNS = """
+        s.employee_id,
+        s.base_salary,
+        s.bonus,
+        s.tax_deduction,
+        s.total_salary,
+        s.payment_date
+"""
+
+QUERY = f"""
+    select {COLUMNS}
+    from main.salary s
+"""
+
+CHUNK_QUERY = f"""
+    select s.rowid as rowid_, {COLUMNS}
+    from main.salary s
+    where s.rowid > ?
+    order by s.rowid
+    limit ?
+"""
+
+
+def get_connection(path=None, immutable=None):
+    path = path or os.getenv("SALARY_DB")  # db path
+    immutable = IMMUTABLE if immutable is None else immutable
+    # open read-only: the extractor never writes to the salary db
+    uri = f"file:{pathname2url(os.path.abspath(path))}?mode=ro"
+    if immutable:
+        uri += "&immutable=1"
+    return sqlite3.connect(uri, uri=True)
+
+
+def read_chunks(conn, after_rowid=0, chunk_rows=None, progress=None):
+    # rowid is the table's b-tree key, so every chunk is a range seek, not a scan
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    last_rowid = after_rowid
+    while True:
+        df = pd.read_sql(CHUNK_QUERY, conn, params=(last_rowid, chunk_rows))
+        if df.empty:
+            break
+        last_rowid = int(df["rowid_"].iloc[-1])
+        if progress is not None:
+            progress["rowid"] = last_rowid
+        yield df.drop(columns="rowid_")
+
+
 def extract_sqlite():
-    conn = sqlite3.connect(os.getenv("SALARY_DB"))  # db path
-
-    query = """
-        select
-            s.employee_id,
-            s.base_salary,
-            s.bonus,
-            s.tax_deduction,
-            s.total_salary,
-            s.payment_date
-        from main.salary s
-    """
-    df = pd.read_sql(query, conn)
-    conn.close()
-    upload_to_snowflake(df, "salarys")
+    conn = get_connection()
+    try:
+        if INCREMENTAL:
+            after_rowid = load_state(WATERMARK_KEY, 0)
+            progress = {"rowid": after_rowid}
+            upload_batches_to_snowflake(read_chunks(conn, after_rowid, progress=progress), TABLE_NAME,
+                                        mode=LOAD_MODE, key_columns=KEY_COLUMNS)
+            # the watermark only moves after the upload has succeeded
+            if progress["rowid"] != after_rowid:
+                save_state(WATERMARK_KEY, progress["rowid"])
+        else:
+            df = pd.read_sql(QUERY, conn)
+            upload_to_snowflake(df, TABLE_NAME, mode=LOAD_MODE, key_columns=KEY_COLUMNS)
+    finally:
+        conn.close()
+
+
+# partitioned mode: plan_partitions -> extract_partition (mapped, parallel) -> publish
+PARTITION_COLUMNS = ("employee_id", "payment_date")
+
+
+def plan_partitions(column, count):
+    if column not in PARTITION_COLUMNS:
+        raise ValueError(f"Cannot partition salarys on {column}")
+    conn = get_connection()
+    try:
+        low, high = conn.execute(f"select min(s.{column}), max(s.{column}) from main.salary s").fetchone()
+        column_types = source_column_types(conn)
+    finally:
+        conn.close()
+    return [{"column": column, "column_types": column_types, **part} for part in split_range(low, high, count)]
+
+
+def source_column_types(conn):
+    # one shared schema for every partition table, from a non-null value of each column
+    columns = [col[0] for col in conn.execute(f"{QUERY} limit 0").description]
+    sample = {}
+    for col in columns:
+        row = conn.execute(f"select s.{col} from main.salary s where s.{col} is not null limit 1").fetchone()
+        sample[col] = row[0] if row else None
+    return sample_column_types(sample)
+
+
+def extract_partition(column, index, lower, upper, last, run_id, column_types=None):
+    # run_id comes from the Airflow context and keeps concurrent runs' part tables apart
+    if column not in PARTITION_COLUMNS:
+        raise ValueError(f"Cannot partition salarys on {column}")
+    upper_op = "<=" if last else "<"
+    query = f"{QUERY} where s.{column} >= :lower and s.{column} {upper_op} :upper"
+    part_table = part_table_name(TABLE_NAME, index, run_id)
+    conn = get_connection()
+    try:
+        batches = pd.read_sql(query, conn, params={"lower": lower, "upper": upper}, chunksize=CHUNK_ROWS)
+        rows = upload_batches_to_snowflake(batches, part_table, mode="replace", column_types=column_types)
+    finally:
+        conn.close()
+    return {"table": part_table if rows else None, "rows": rows}
+
+
+def publish(parts, run_id):
+    publish_partitions(TABLE_NAME, [part["table"] for part in parts if part["table"]],
+                       mode=LOAD_MODE, key_columns=KEY_COLUMNS, run_id=run_id)
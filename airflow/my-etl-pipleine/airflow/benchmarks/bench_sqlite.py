@@ -0,0 +1,48 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+
+import pandas as pd
+
+from app.salary.extract_sqlite import QUERY, get_connection, read_chunks
+from benchmarks.common import run_isolated
+from benchmarks.datagen import write_salary_db
+
+# usage (from the airflow/ directory):
+#   python -m benchmarks.bench_sqlite --rows 3000000
+
+
+def full_read(path):
+    conn = sqlite3.connect(path)
+    df = pd.read_sql(QUERY, conn)
+    conn.close()
+    return len(df)
+
+
+def chunked_read(path, chunk_rows):
+    conn = get_connection(path, immutable=True)
+    rows = sum(len(df) for df in read_chunks(conn, 0, chunk_rows))
+    conn.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=3000000)
+    parser.add_argument("--chunk-rows", type=int, default=100000)
+    parser.add_argument("--db", help="existing salary db; a temporary one is generated if omitted")
+    args = parser.parse_args()
+
+    path = args.db
+    if not path:
+        path = os.path.join(tempfile.mkdtemp(), "salary.db")
+        write_salary_db(path, args.rows)
+
+    print({"mode": "full_read", **run_isolated(full_read, path)})
+    print({"mode": "chunked", "chunk_rows": args.chunk_rows,
+           **run_isolated(chunked_read, path, args.chunk_rows)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import time
+
+from benchmarks.datagen import make_orders
+from benchmarks.fake_snowflake import FakeConnection
+from utils.snowflake_uploader import upload_to_snowflake
+
+# usage (from the airflow/ directory):
+#   python -m benchmarks.bench_upload --rows 200000 --latency 0.002
+
+
+def run(df, method, latency, **kwargs):
+    conn = FakeConnection(latency=latency)
+    start = time.perf_counter()
+    upload_to_snowflake(df, "orders", method=method, conn=conn, **kwargs)
+    elapsed = time.perf_counter() - start
+    return {
+        "method": method,
+        "rows": len(df),
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(len(df) / elapsed),
+        "round_trips": conn.round_trips,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--insert-rows", type=int, default=5000,
+                        help="the row-by-row path is slow, so it is measured on a smaller sample")
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--chunk-rows", type=int, default=50000)
+    parser.add_argument("--put-threads", type=int, default=4)
+    args = parser.parse_args()
+
+    df = make_orders(0, args.rows)
+    print(run(df.head(args.insert_rows), "insert", args.latency))
+    for file_format in ("parquet", "csv"):
+        result = run(df, "copy", args.latency, chunk_rows=args.chunk_rows,
+                     put_threads=args.put_threads, file_format=file_format)
+        result["file_format"] = file_format
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
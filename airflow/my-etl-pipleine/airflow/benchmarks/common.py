@@ -0,0 +1,29 @@
+import multiprocessing
+import resource
+import time
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _child(queue, fn, args):
+    start = time.perf_counter()
+    result = fn(*args)
+    queue.put({
+        "result": result,
+        "seconds": round(time.perf_counter() - start, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    })
+
+
+def run_isolated(fn, *args):
+    # every measurement runs in its own process so peak RSS figures don't mix
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(queue, fn, args))
+    proc.start()
+    measurement = queue.get()
+    proc.join()
+    return measurement
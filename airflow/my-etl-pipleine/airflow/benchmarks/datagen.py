@@ -0,0 +1,107 @@
+import io
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+# synthetic employees, salary and orders data. everything is written GEN_BATCH rows
+# at a time so large volumes fit in memory
+
+GEN_BATCH = 200000
+DEPARTMENTS = ["finance", "sales", "it", "hr", "marketing", "logistics"]
+POSITIONS = ["analyst", "engineer", "manager", "specialist", "director"]
+PRODUCTS = ["book", "pen", "laptop", "phone", "bag"]
+
+
+def make_employees(start, rows, seed=1):
+    rng = np.random.default_rng(seed + start)
+    ids = np.arange(start + 1, start + rows + 1)
+    return pd.DataFrame({
+        "id": ids,
+        "firstname": [f"first{i}" for i in ids],
+        "lastname": [f"last{i}" for i in ids],
+        "position": rng.choice(POSITIONS, rows),
+        "department": rng.choice(DEPARTMENTS, rows),
+        "event_date": (pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 2000, rows), unit="D")).date,
+        "salary": rng.uniform(1000, 9000, rows).round(2),
+    })
+
+
+def make_salary(start, rows, seed=2):
+    rng = np.random.default_rng(seed + start)
+    base = rng.uniform(1000, 9000, rows).round(2)
+    bonus = rng.uniform(0, 1000, rows).round(2)
+    tax = ((base + bonus) * 0.12).round(2)
+    dates = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 730, rows), unit="D")
+    return pd.DataFrame({
+        "employee_id": rng.integers(1, 50000, rows),
+        "base_salary": base,
+        "bonus": bonus,
+        "tax_deduction": tax,
+        "total_salary": (base + bonus - tax).round(2),
+        "payment_date": dates.strftime("%Y-%m-%d"),
+    })
+
+
+def make_orders(start, rows, seed=3):
+    rng = np.random.default_rng(seed + start)
+    return pd.DataFrame({
+        "order_id": np.arange(start + 1, start + rows + 1),
+        "customer_id": rng.integers(1, 50000, rows),
+        "product": rng.choice(PRODUCTS, rows),
+        "quantity": rng.integers(1, 10, rows),
+        "price": rng.uniform(1, 500, rows).round(2),
+        "order_date": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+    })
+
+
+def batches(make, rows):
+    for start in range(0, rows, GEN_BATCH):
+        yield make(start, min(GEN_BATCH, rows - start))
+
+
+def write_salary_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        create table salary (
+            employee_id integer,
+            base_salary real,
+            bonus real,
+            tax_deduction real,
+            total_salary real,
+            payment_date text
+        )
+    """)
+    for df in batches(make_salary, rows):
+        conn.executemany("insert into salary values (?, ?, ?, ?, ?, ?)",
+                         df.itertuples(index=False, name=None))
+    conn.commit()
+    conn.close()
+
+
+def write_orders_csv(path, rows):
+    for i, df in enumerate(batches(make_orders, rows)):
+        df.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+
+
+def load_employees_postgres(conn, rows):
+    # only run against a local, throwaway Postgres database: public.employees is recreated
+    with conn.cursor() as cur:
+        cur.execute("drop table if exists public.employees")
+        cur.execute("""
+            create table public.employees (
+                id integer primary key,
+                firstname text,
+                lastname text,
+                position text,
+                department text,
+                event_date date,
+                salary numeric(12, 2)
+            )
+        """)
+        for df in batches(make_employees, rows):
+            buffer = io.StringIO()
+            df.to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+            cur.copy_expert("copy public.employees from stdin with (format csv)", buffer)
+    conn.commit()
@@ -0,0 +1,70 @@
+import os
+import re
+import threading
+import time
+
+# local stand-in for the Snowflake connector: records the statements it gets
+# and simulates network latency on every round trip
+
+PUT_RE = re.compile(r"PUT\s+'file://([^']+)'", re.IGNORECASE)
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.record(sql, params)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self.conn.record(sql, list(seq_of_params))
+        return self
+
+    def fetchone(self):
+        return (1,)
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, latency=0.002, upload_mb_per_s=50.0, keep_statements=False):
+        self.latency = latency
+        self.upload_mb_per_s = upload_mb_per_s
+        self.keep_statements = keep_statements
+        self.statements = []
+        self.round_trips = 0
+        self.bytes_uploaded = 0
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def record(self, sql, params=None):
+        delay = self.latency
+        match = PUT_RE.search(sql)
+        if match:
+            size = os.path.getsize(match.group(1))
+            delay += size / (self.upload_mb_per_s * 1024 * 1024)
+            with self._lock:
+                self.bytes_uploaded += size
+        with self._lock:
+            self.round_trips += 1
+            if self.keep_statements:
+                self.statements.append((sql, params))
+        time.sleep(delay)
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+
+def connect(**kwargs):
+    return FakeConnection()
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks import datagen
+from benchmarks.common import run_isolated
+from benchmarks.fake_snowflake import FakeConnection
+
+# measures the extractors and uploaders against local stand-ins and writes a JSON report.
+# usage (from the airflow/ directory):
+#   python -m benchmarks.run_suite --rows 1000000 --output bench.json
+#   python -m benchmarks.run_suite --rows 1000000 --pg   # against the local postgres in PG_* env
+
+
+def bench_sqlite_full(path):
+    from app.salary.extract_sqlite import QUERY
+
+    conn = sqlite3.connect(path)
+    queries = []
+    conn.set_trace_callback(queries.append)
+    rows = len(pd.read_sql(QUERY, conn))
+    conn.close()
+    return {"rows": rows, "round_trips": len(queries)}
+
+
+def bench_sqlite_chunked(path, chunk_rows):
+    from app.salary.extract_sqlite import get_connection, read_chunks
+
+    conn = get_connection(path, immutable=True)
+    queries = []
+    conn.set_trace_callback(queries.append)
+    rows = sum(len(df) for df in read_chunks(conn, 0, chunk_rows))
+    conn.close()
+    return {"rows": rows, "round_trips": len(queries)}
+
+
+def bench_csv_pandas(path):
+    return {"rows": len(pd.read_csv(path)), "round_trips": 0}
+
+
+def bench_csv_arrow(path, block_size):
+    from app.shop.extract_csv import read_batches
+
+    return {"rows": sum(batch.num_rows for batch in read_batches(path, block_size, {})), "round_trips": 0}
+
+
+def counting_cursor(counter):
+    # cursor_factory counting the statements a psycopg2 cursor sends to the server, the
+    # way the sqlite benchmarks count them through the trace callback: every execute
+    # (DECLARE for a named cursor) plus, on a named cursor, every FETCH and the CLOSE.
+    # a plain cursor receives its whole result with the execute, so fetching from it is free
+    import psycopg2.extensions
+    from collections import deque
+
+    class CountingCursor(psycopg2.extensions.cursor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._buffered = deque()
+
+        def execute(self, query, vars=None):
+            counter["round_trips"] += 1
+            return super().execute(query, vars)
+
+        def fetchmany(self, size=None):
+            if self.name:
+                counter["round_trips"] += 1
+            return super().fetchmany(self.arraysize if size is None else size)
+
+        def __next__(self):
+            if not self.name:
+                return super().__next__()
+            # psycopg2 iterates a named cursor with one FETCH FORWARD itersize per round;
+            # doing the same through fetchmany lets every one of them be counted
+            if not self._buffered:
+                self._buffered.extend(self.fetchmany(self.itersize))
+                if not self._buffered:
+                    raise StopIteration
+            return self._buffered.popleft()
+
+        def close(self):
+            if self.name and not self.closed:
+                counter["round_trips"] += 1
+            super().close()
+
+    return CountingCursor
+
+
+def bench_postgres_full():
+    from app.human_resource.extract_postgres import QUERY, get_connection
+
+    counter = {"round_trips": 0}
+    conn = get_connection()
+    conn.cursor_factory = counting_cursor(counter)
+    rows = len(pd.read_sql(QUERY, conn))
+    conn.close()
+    return {"rows": rows, **counter}
+
+
+def bench_postgres_stream(itersize, batch_rows):
+    from app.human_resource.extract_postgres import QUERY, get_connection, read_batches
+
+    counter = {"round_trips": 0}
+    conn = get_connection()
+    conn.cursor_factory = counting_cursor(counter)
+    rows = sum(len(df) for df in read_batches(conn, QUERY, batch_rows=batch_rows, itersize=itersize))
+    conn.close()
+    return {"rows": rows, **counter}
+
+
+def bench_upload(rows, method, latency, file_format):
+    from utils.snowflake_uploader import upload_batches_to_snowflake
+
+    conn = FakeConnection(latency=latency)
+    total = upload_batches_to_snowflake(datagen.batches(datagen.make_orders, rows), "orders",
+                                        method=method, file_format=file_format, conn=conn)
+    return {"rows": total, "round_trips": conn.round_trips, "bytes_uploaded": conn.bytes_uploaded}
+
+
+def measure(name, fn, *args):
+    measurement = run_isolated(fn, *args)
+    result = measurement.pop("result")
+    rows = result.get("rows", 0)
+    return {
+        "name": name,
+        **result,
+        **measurement,
+        "rows_per_s": round(rows / measurement["seconds"]) if measurement["seconds"] else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--insert-rows", type=int, default=5000,
+                        help="row-by-row upload is slow, so it is measured on a smaller sample")
+    parser.add_argument("--chunk-rows", type=int, default=100000)
+    parser.add_argument("--block-size", type=int, default=32 * 1024 * 1024)
+    parser.add_argument("--itersize", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=0.002, help="fake Snowflake round trip, seconds")
+    parser.add_argument("--pg", action="store_true",
+                        help="write employees to the local postgres in PG_* env and measure it")
+    parser.add_argument("--output", help="JSON file; stdout if omitted")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="etl_bench_")
+    salary_db = os.path.join(work_dir, "salary.db")
+    orders_csv = os.path.join(work_dir, "orders.csv")
+
+    start = time.perf_counter()
+    datagen.write_salary_db(salary_db, args.rows)
+    datagen.write_orders_csv(orders_csv, args.rows)
+    generate_seconds = time.perf_counter() - start
+
+    results = [
+        measure("sqlite_full_read", bench_sqlite_full, salary_db),
+        measure("sqlite_chunked_read", bench_sqlite_chunked, salary_db, args.chunk_rows),
+        measure("csv_pandas_read", bench_csv_pandas, orders_csv),
+        measure("csv_arrow_threaded", bench_csv_arrow, orders_csv, args.block_size),
+        measure("upload_insert", bench_upload, args.insert_rows, "insert", args.latency, None),
+        measure("upload_copy_parquet", bench_upload, args.rows, "copy", args.latency, "parquet"),
+        measure("upload_copy_csv", bench_upload, args.rows, "copy", args.latency, "csv"),
+    ]
+
+    if args.pg:
+        from app.human_resource.extract_postgres import get_connection
+
+        conn = get_connection()
+        datagen.load_employees_postgres(conn, args.rows)
+        conn.close()
+        results.append(measure("postgres_full_read", bench_postgres_full))
+        results.append(measure("postgres_stream", bench_postgres_stream, args.itersize, args.chunk_rows))
+
+    report = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "rows": args.rows,
+        "generate_seconds": round(generate_seconds, 3),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,91 @@
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from airflow import DAG
+from airflow.exceptions import AirflowSkipException
 from airflow.operators.python import PythonOperator
 from datetime import datetime
 
-from app.human_resource.extract_postgres import extract_postgres
-from app.salary.extract_sqlite import extract_sqlite
+from app.human_resource import extract_postgres as human_resource
+from app.salary import extract_sqlite as salary
 from app.shop.extract_csv import extract_csv
+from utils.snowflake_session import pool_stats
+
+logger = logging.getLogger(__name__)
+
+# sources listed in ETL_PARTITIONS are split into key ranges that run as parallel
+# mapped tasks, then published to the target table in one commit step. partitioned
+# runs read the whole source, skipping the streaming/incremental single-task path,
+# so they are opt-in per source, e.g.
+#   ETL_PARTITIONS='{"extract_postgres": {"column": "employee_id", "count": 4}}'
+PARTITIONS = json.loads(os.getenv("ETL_PARTITIONS", "{}"))
+
+SOURCES = {
+    "extract_postgres": (human_resource, human_resource.extract_postgres),
+    "extract_csv": (None, extract_csv),
+    "extract_sqlite": (salary, salary.extract_sqlite),
+}
+
+# airflow runs every task in a process of its own, so separate tasks can never share
+# a Snowflake session. with ETL_SHARED_SESSION=true the unpartitioned sources run
+# inside one extract_sources task instead, drawing on that process's session pool.
+# that trades per-source retries for fewer logins, so it is opt-in. by default the
+# sources still run side by side (one worker each); ETL_SHARED_SESSION_WORKERS=1
+# runs them one after another on a single session.
+SHARED_SESSION = os.getenv("ETL_SHARED_SESSION", "false").lower() == "true"
+SHARED_SESSION_WORKERS = int(os.getenv("ETL_SHARED_SESSION_WORKERS", str(len(SOURCES))))
+
+
+def source_tasks(task_id, module, extract_callable):
+    config = PARTITIONS.get(task_id)
+    if not config:
+        return PythonOperator(
+            task_id=task_id,
+            python_callable=extract_callable
+        )
+
+    plan = PythonOperator(
+        task_id=f"{task_id}_plan",
+        python_callable=module.plan_partitions,
+        op_kwargs={"column": config["column"], "count": config["count"]}
+    )
+    extract = PythonOperator.partial(
+        task_id=f"{task_id}_partition",
+        python_callable=module.extract_partition
+    ).expand(op_kwargs=plan.output)
+    commit = PythonOperator(
+        task_id=f"{task_id}_commit",
+        python_callable=module.publish,
+        op_kwargs={"parts": extract.output}
+    )
+    plan >> extract >> commit
+    return plan
+
+
+def extract_sources(task_ids):
+    # every source runs even if another one fails; the task fails if any did and is
+    # skipped only if all of them skipped (e.g. an unchanged csv on its own)
+    with ThreadPoolExecutor(max_workers=max(1, SHARED_SESSION_WORKERS)) as pool:
+        futures = {task_id: pool.submit(SOURCES[task_id][1]) for task_id in task_ids}
+
+    failed, skipped = [], []
+    for task_id, future in futures.items():
+        try:
+            future.result()
+        except AirflowSkipException as e:
+            logger.info("%s skipped: %s", task_id, e)
+            skipped.append(task_id)
+        except Exception:
+            logger.exception("%s failed", task_id)
+            failed.append(task_id)
+    logger.info("Snowflake session pool: %s", pool_stats())
+
+    if failed:
+        raise RuntimeError(f"Sources failed: {', '.join(failed)}")
+    if len(skipped) == len(task_ids):
+        raise AirflowSkipException("No source had anything to load")
+
 
 with DAG(
     dag_id="etl_to_snowflake",
@@ -12,20 +93,13 @@ with DAG(
     schedule="@daily",
     catchup=False
 ) as dag:
-    
-    t1 = PythonOperator(
-        task_id="extract_postgres",
-        python_callable=extract_postgres
-    )
-    
-    t2 = PythonOperator(
-        task_id="extract_csv",
-        python_callable=extract_csv
-    )
-    
-    t3 = PythonOperator(
-        task_id="extract_sqlite",
-        python_callable=extract_sqlite
-    )
-    
-    [t1, t2, t3]
+
+    shared = [task_id for task_id in SOURCES if SHARED_SESSION and task_id not in PARTITIONS]
+    tasks = [source_tasks(task_id, module, extract_callable)
+             for task_id, (module, extract_callable) in SOURCES.items() if task_id not in shared]
+    if shared:
+        tasks.append(PythonOperator(
+            task_id="extract_sources",
+            python_callable=extract_sources,
+            op_kwargs={"task_ids": shared}
+        ))
@@ -0,0 +1,7 @@
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# dags import app/ and utils/ as top-level packages, as they do from the airflow home
+sys.path.insert(0, os.path.join(HERE, ".."))
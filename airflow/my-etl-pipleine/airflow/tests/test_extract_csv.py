@@ -0,0 +1,31 @@
+import pyarrow as pa
+
+from app.shop.extract_csv import read_batches
+
+
+def write_csv(path, lines):
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_types_are_inferred_over_the_whole_file(tmp_path):
+    # small parse blocks put the decimal and the blank far past the first one
+    rows = [f"{i},{i}," for i in range(20000)] + ["1.5,,"]
+    path = write_csv(tmp_path / "orders.csv", ["order_id,quantity,note"] + rows)
+
+    batches = list(read_batches(path, block_size=1 << 14, column_types={}, batch_rows=5000))
+
+    assert sum(batch.num_rows for batch in batches) == 20001
+    assert {batch.schema for batch in batches} == {batches[0].schema}
+    assert batches[0].schema.field("order_id").type == pa.float64()
+    assert batches[0].schema.field("quantity").type == pa.int64()
+    assert batches[0].schema.field("note").type == pa.string()
+    assert batches[-1].column("quantity").to_pylist()[-1] is None
+
+
+def test_explicit_column_types_are_kept(tmp_path):
+    path = write_csv(tmp_path / "orders.csv", ["order_id,code", "1,007", "2,010"])
+
+    batches = list(read_batches(path, column_types={"code": "string"}))
+
+    assert batches[0].column("code").to_pylist() == ["007", "010"]
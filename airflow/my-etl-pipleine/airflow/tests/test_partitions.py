@@ -0,0 +1,66 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from app.salary import extract_sqlite
+from benchmarks.fake_snowflake import FakeConnection
+from utils.snowflake_uploader import publish_partitions, upload_batches_to_snowflake
+
+
+@pytest.fixture
+def salary_db(tmp_path, monkeypatch):
+    path = tmp_path / "salary.db"
+    conn = sqlite3.connect(path)
+    conn.execute("create table salary (employee_id integer, base_salary real, bonus real, "
+                 "tax_deduction real, total_salary real, payment_date text)")
+    # bonuses only start with employee 50, so the first partitions have none at all
+    conn.executemany("insert into salary values (?, ?, ?, ?, ?, ?)",
+                     [(i, 1000.0, 10.5 if i >= 50 else None, 120.0, 880.0, "2024-01-01") for i in range(100)])
+    conn.commit()
+    conn.close()
+    monkeypatch.setenv("SALARY_DB", str(path))
+    return path
+
+
+def statements(conn):
+    return [sql for sql, _ in conn.statements]
+
+
+def test_partitions_share_one_schema(salary_db):
+    parts = extract_sqlite.plan_partitions("employee_id", 4)
+
+    assert len(parts) == 4
+    assert all(part["column_types"] == parts[0]["column_types"] for part in parts)
+    assert parts[0]["column_types"]["bonus"] == "FLOAT"
+    assert parts[0]["column_types"]["employee_id"] == "NUMBER(38,0)"
+
+
+def test_all_null_column_keeps_the_shared_type(salary_db):
+    column_types = extract_sqlite.plan_partitions("employee_id", 4)[0]["column_types"]
+    first = pd.read_sql("select * from salary where employee_id < 25", sqlite3.connect(salary_db))
+    assert first["bonus"].isna().all()
+    conn = FakeConnection(latency=0, keep_statements=True)
+
+    upload_batches_to_snowflake([first], "salarys_part_x_0", mode="replace",
+                                column_types=column_types, conn=conn, method="insert")
+
+    create = next(sql for sql in statements(conn) if sql.startswith("CREATE"))
+    assert "bonus FLOAT" in create
+
+
+def test_replace_publish_without_partitions_empties_the_target():
+    conn = FakeConnection(latency=0, keep_statements=True)
+
+    publish_partitions("orders", [], mode="replace", conn=conn, run_id="run")
+
+    assert statements(conn) == ["TRUNCATE TABLE IF EXISTS orders"]
+
+
+@pytest.mark.parametrize("mode", ["append", "merge"])
+def test_incremental_publish_without_partitions_is_a_no_op(mode):
+    conn = FakeConnection(latency=0, keep_statements=True)
+
+    publish_partitions("orders", [], mode=mode, key_columns=["id"], conn=conn, run_id="run")
+
+    assert statements(conn) == []
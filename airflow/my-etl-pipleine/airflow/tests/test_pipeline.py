@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+from utils.pipeline import run_pipeline
+
+
+def test_batches_are_consumed_in_order_and_counted():
+    seen = []
+    stats = run_pipeline(([i] * 3 for i in range(5)), seen.append)
+
+    assert seen == [[i] * 3 for i in range(5)]
+    assert stats["batches"] == 5 and stats["rows"] == 15
+
+
+def test_full_queue_holds_the_reader_back():
+    read = []
+    consumed = []
+    release = threading.Event()
+
+    def batches():
+        for i in range(20):
+            read.append(i)
+            yield [i]
+
+    def consume(batch):
+        release.wait(5)
+        consumed.append(batch)
+
+    thread = threading.Thread(target=run_pipeline, args=(batches(), consume), kwargs={"queue_size": 2})
+    thread.start()
+    time.sleep(0.2)
+    # one batch in the worker, queue_size on the queue, one waiting to be put
+    assert len(read) == 1 + 2 + 1
+    release.set()
+    thread.join(5)
+    assert len(consumed) == 20
+
+
+def test_upload_error_stops_the_reader_and_is_raised():
+    read = []
+
+    def batches():
+        for i in range(100):
+            read.append(i)
+            yield [i]
+
+    def consume(batch):
+        if batch == [2]:
+            raise RuntimeError("upload failed")
+
+    with pytest.raises(RuntimeError, match="upload failed"):
+        run_pipeline(batches(), consume, workers=2)
+    assert len(read) < 100
+
+
+def test_source_error_is_raised_and_the_workers_exit():
+    def batches():
+        yield [1]
+        raise ValueError("source went away")
+
+    before = threading.active_count()
+    with pytest.raises(ValueError, match="source went away"):
+        run_pipeline(batches(), lambda batch: None, workers=3)
+    assert threading.active_count() == before
@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+import utils.state as state
+from app.salary import extract_sqlite
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(state, "STATE_DIR", str(tmp_path / "state"))
+
+
+def test_state_round_trips_and_defaults():
+    assert state.load_state("salary_rowid", 0) == 0
+    state.save_state("salary_rowid", 42)
+    state.save_state("fingerprint", {"size": 1, "sha256": "ab"})
+
+    assert state.load_state("salary_rowid", 0) == 42
+    assert state.load_state("fingerprint") == {"size": 1, "sha256": "ab"}
+
+
+@pytest.fixture
+def salary_db(tmp_path, monkeypatch):
+    path = tmp_path / "salary.db"
+    conn = sqlite3.connect(path)
+    conn.execute("create table salary (employee_id int, base_salary real, bonus real, tax_deduction real,"
+                 " total_salary real, payment_date text)")
+    conn.commit()
+    conn.close()
+    monkeypatch.setenv("SALARY_DB", str(path))
+    return path
+
+
+def add_payments(path, employee_ids):
+    conn = sqlite3.connect(path)
+    conn.executemany("insert into salary values (?, 100, 10, 5, 105, '2024-01-31')",
+                     [(employee_id,) for employee_id in employee_ids])
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    loaded = []
+
+    def upload(batches, table_name, **kwargs):
+        for df in batches:
+            if loaded == ["fail"]:
+                raise RuntimeError("snowflake is down")
+            loaded.extend(df["employee_id"])
+
+    monkeypatch.setattr(extract_sqlite, "upload_batches_to_snowflake", upload)
+    monkeypatch.setattr(extract_sqlite, "CHUNK_ROWS", 2)
+    return loaded
+
+
+def test_incremental_runs_only_read_new_rows(salary_db, uploads):
+    add_payments(salary_db, [1, 2, 3])
+    extract_sqlite.extract_sqlite()
+    assert uploads == [1, 2, 3]
+    assert state.load_state(extract_sqlite.WATERMARK_KEY) == 3
+
+    add_payments(salary_db, [4, 5])
+    extract_sqlite.extract_sqlite()
+    assert uploads == [1, 2, 3, 4, 5]
+    assert state.load_state(extract_sqlite.WATERMARK_KEY) == 5
+
+
+def test_watermark_stays_put_when_the_upload_fails(salary_db, uploads):
+    add_payments(salary_db, [1, 2, 3])
+    uploads.append("fail")
+
+    with pytest.raises(RuntimeError, match="snowflake is down"):
+        extract_sqlite.extract_sqlite()
+    assert state.load_state(extract_sqlite.WATERMARK_KEY) is None
+
+
+def test_run_without_new_rows_leaves_the_state_file_alone(salary_db, uploads):
+    extract_sqlite.extract_sqlite()
+    assert uploads == []
+    assert state.load_state(extract_sqlite.WATERMARK_KEY) is None
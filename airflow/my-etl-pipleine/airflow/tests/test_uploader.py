@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+from benchmarks.fake_snowflake import FakeConnection
+from utils.snowflake_uploader import upload_batches_to_snowflake
+
+
+def frames(count, rows=3):
+    for i in range(count):
+        yield pd.DataFrame({"id": range(i * rows, (i + 1) * rows), "name": [f"row {n}" for n in range(rows)]})
+
+
+def upload(batches, **kwargs):
+    conn = FakeConnection(latency=0, keep_statements=True)
+    rows = upload_batches_to_snowflake(batches, "orders", conn=conn, method="insert", **kwargs)
+    return rows, [sql for sql, _ in conn.statements]
+
+
+def test_replace_loads_a_side_table_and_swaps_it_in():
+    rows, sql = upload(frames(2))
+
+    load_table = sql[0].split()[2]
+    assert rows == 6
+    assert sql[0].startswith(f"CREATE TABLE {load_table} (id NUMBER(38,0), name STRING)")
+    assert all(statement.startswith(f"INSERT INTO {load_table} ") for statement in sql[1:7])
+    assert sql[7:] == [f"CREATE TABLE IF NOT EXISTS orders LIKE {load_table}",
+                       f"ALTER TABLE orders SWAP WITH {load_table}",
+                       f"DROP TABLE IF EXISTS {load_table}"]
+
+
+def test_failed_replace_leaves_the_target_alone():
+    conn = FakeConnection(latency=0, keep_statements=True)
+
+    def failing():
+        yield from frames(1)
+        raise RuntimeError("source went away")
+
+    with pytest.raises(RuntimeError, match="source went away"):
+        upload_batches_to_snowflake(failing(), "orders", conn=conn, method="insert")
+
+    sql = [statement for statement, _ in conn.statements]
+    load_table = sql[0].split()[2]
+    assert not any(" orders " in f"{statement} " for statement in sql)
+    assert sql[-1] == f"DROP TABLE IF EXISTS {load_table}"
+
+
+def test_empty_replace_empties_the_target():
+    assert upload(iter([])) == (0, ["TRUNCATE TABLE IF EXISTS orders"])
+
+
+def test_merge_upserts_changed_rows_through_a_temporary_table():
+    rows, sql = upload(frames(1), mode="merge", key_columns=["id"])
+
+    stage = sql[1].split()[3]
+    assert rows == 3
+    assert sql[0] == "CREATE TABLE IF NOT EXISTS orders (id NUMBER(38,0), name STRING)"
+    assert sql[1].startswith(f"CREATE TEMPORARY TABLE {stage} ")
+    assert sql[-2].startswith(f"MERGE INTO orders t USING {stage} s ON t.id = s.id "
+                              "WHEN MATCHED AND (t.name IS DISTINCT FROM s.name)")
+    assert sql[-1] == f"DROP TABLE IF EXISTS {stage}"
@@ -0,0 +1,70 @@
+import hashlib
+import math
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+
+def split_range(low, high, count):
+    # splits [low, high] into count partitions, each [lower, upper) and the last one
+    # [lower, high]. the result goes through XCom, so it is JSON serializable
+    if low is None or high is None:
+        return []
+    count = max(1, int(count))
+
+    # text dates (sqlite) are returned in the same format so they still compare correctly
+    sep = "T" if isinstance(low, str) and "T" in low else " "
+    if isinstance(low, str):
+        low, high = parse_bound(low), parse_bound(high)
+    if isinstance(low, Decimal):
+        low, high = float(low), float(high)
+
+    if isinstance(low, datetime):
+        step = (high - low) / count
+    elif isinstance(low, date):
+        step = timedelta(days=max(1, math.ceil((high - low).days / count)))
+    elif isinstance(low, int):
+        step = max(1, math.ceil((high - low + 1) / count))
+    else:
+        step = (high - low) / count
+
+    partitions = []
+    lower = low
+    for index in range(count):
+        last = index == count - 1 or not step or lower + step >= high
+        upper = high if last else lower + step
+        partitions.append({
+            "index": index,
+            "lower": to_json(lower, sep),
+            "upper": to_json(upper, sep),
+            "last": last,
+        })
+        if last:
+            break
+        lower = upper
+    return partitions
+
+
+def parse_bound(value):
+    try:
+        return datetime.fromisoformat(value) if "T" in value or " " in value else date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Cannot partition on non-date text value: {value!r}")
+
+
+def to_json(value, sep="T"):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=sep)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def run_tag(run_id):
+    # an Airflow run_id ("scheduled__2025-01-01T00:00:00+00:00") is not a valid table
+    # name, so a short hash of it is used instead. it goes into table names so that
+    # concurrent runs don't overwrite each other's tables
+    return hashlib.sha1(str(run_id).encode()).hexdigest()[:10]
+
+
+def part_table_name(table_name, index, run_id):
+    return f"{table_name}_part_{run_tag(run_id)}_{index}"
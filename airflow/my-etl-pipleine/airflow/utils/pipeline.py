@@ -0,0 +1,86 @@
+import queue
+import threading
+import time
+
+_DONE = object()
+
+
+def run_pipeline(batches, consume, queue_size=2, workers=1):
+    # the caller's thread reads batches and puts them on a bounded queue, and `workers`
+    # threads upload them through consume. a full queue makes the reader wait
+    # (back-pressure), so at most queue_size + workers + 1 batches are in memory
+    q = queue.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+    errors = []
+    lock = threading.Lock()
+    stats = {
+        "batches": 0,
+        "rows": 0,
+        "extract_seconds": 0.0,           # reading the source
+        "extract_blocked_seconds": 0.0,   # queue full: upload is the bottleneck
+        "upload_seconds": 0.0,            # upload time summed over workers
+        "upload_idle_seconds": 0.0,       # queue empty: the source is the bottleneck
+    }
+
+    def worker():
+        idle = busy = 0.0
+        while True:
+            wait_start = time.perf_counter()
+            item = q.get()
+            got = time.perf_counter()
+            idle += got - wait_start
+            if item is _DONE:
+                break
+            if stop.is_set():
+                continue
+            try:
+                consume(item)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            busy += time.perf_counter() - got
+        with lock:
+            stats["upload_idle_seconds"] += idle
+            stats["upload_seconds"] += busy
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+
+    start = time.perf_counter()
+    try:
+        iterator = iter(batches)
+        while not stop.is_set():
+            read_start = time.perf_counter()
+            try:
+                batch = next(iterator)
+            except StopIteration:
+                break
+            read_end = time.perf_counter()
+            stats["extract_seconds"] += read_end - read_start
+            stats["batches"] += 1
+            stats["rows"] += len(batch)
+            while not stop.is_set():
+                try:
+                    q.put(batch, timeout=1)
+                    break
+                except queue.Full:
+                    pass
+            stats["extract_blocked_seconds"] += time.perf_counter() - read_end
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for _ in threads:
+            q.put(_DONE)
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+
+    stats["wall_seconds"] = time.perf_counter() - start
+    # a reader waiting on a full queue means upload is slow; idle workers mean the source is
+    idle_per_worker = stats["upload_idle_seconds"] / len(threads)
+    stats["bottleneck"] = "upload" if stats["extract_blocked_seconds"] > idle_per_worker else "extract"
+    return {key: round(value, 3) if isinstance(value, float) else value for key, value in stats.items()}
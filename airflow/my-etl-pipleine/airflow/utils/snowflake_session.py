@@ -0,0 +1,179 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from snowflake.connector import connect
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# every load in one process draws on the sessions in this pool. airflow runs each task
+# in a process of its own, so sessions are never shared between tasks: sources only
+# share a session when they run in one task (ETL_SHARED_SESSION in dags/etl_to_snowflake.py)
+POOL_SIZE = int(os.getenv("SNOWFLAKE_POOL_SIZE", "4"))
+HEALTH_CHECK_SECONDS = int(os.getenv("SNOWFLAKE_HEALTH_CHECK_SECONDS", "60"))
+MAX_IDLE_SECONDS = int(os.getenv("SNOWFLAKE_MAX_IDLE_SECONDS", "1800"))
+ACQUIRE_TIMEOUT_SECONDS = int(os.getenv("SNOWFLAKE_ACQUIRE_TIMEOUT_SECONDS", "600"))
+
+
+def get_connection():
+    return connect(
+        user=os.getenv("SNOWFLAKE_USER"),
+        password=os.getenv("SNOWFLAKE_PASSWORD"),
+        account=os.getenv("SNOWFLAKE_ACCOUNT"),
+        warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
+        database=os.getenv("SNOWFLAKE_DATABASE"),
+        schema=os.getenv("SNOWFLAKE_SCHEMA"),
+        # so the session token doesn't expire while the session sits in the pool
+        client_session_keep_alive=True
+    )
+
+
+class SessionPool:
+    def __init__(self, connect_fn=get_connection, max_size=POOL_SIZE,
+                 health_check_seconds=HEALTH_CHECK_SECONDS, max_idle_seconds=MAX_IDLE_SECONDS):
+        self.connect_fn = connect_fn
+        self.max_size = max_size
+        self.health_check_seconds = health_check_seconds
+        self.max_idle_seconds = max_idle_seconds
+        self._idle = []  # (conn, last_used)
+        self._open = 0
+        self._cond = threading.Condition()
+        self.connects = 0
+        self.reuses = 0
+        self.connect_seconds = 0.0
+        self.health_check_failures = 0
+
+    def acquire(self, timeout=ACQUIRE_TIMEOUT_SECONDS):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not self._idle and self._open >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No Snowflake session free after {timeout}s")
+                self._cond.wait(remaining)
+            if self._idle:
+                conn, last_used = self._idle.pop()
+            else:
+                conn, last_used = None, None
+                self._open += 1
+
+        try:
+            if conn is not None:
+                if self._healthy(conn, last_used):
+                    with self._cond:
+                        self.reuses += 1
+                    return conn
+                self._close_quietly(conn)
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, discard=False):
+        with self._cond:
+            if discard or conn.is_closed():
+                self._open -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if discard:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def session(self):
+        # after an error the session's state is unknown (an open transaction, a half-run
+        # statement), so it is closed instead of going back to the pool
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException:
+            self.release(conn, discard=True)
+            raise
+        self.release(conn)
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        with self._cond:
+            avg_connect = self.connect_seconds / self.connects if self.connects else 0.0
+            return {
+                "connects": self.connects,
+                "reuses": self.reuses,
+                "open": self._open,
+                "idle": len(self._idle),
+                "health_check_failures": self.health_check_failures,
+                "avg_connect_seconds": round(avg_connect, 3),
+                # every reuse saves one connect (auth + warehouse resume)
+                "saved_connect_seconds": round(avg_connect * self.reuses, 3),
+            }
+
+    def _connect(self):
+        start = time.perf_counter()
+        conn = self.connect_fn()
+        elapsed = time.perf_counter() - start
+        with self._cond:
+            self.connects += 1
+            self.connect_seconds += elapsed
+        return conn
+
+    def _healthy(self, conn, last_used):
+        if conn.is_closed():
+            return False
+        idle_for = time.monotonic() - last_used
+        if idle_for > self.max_idle_seconds:
+            return False
+        if idle_for > self.health_check_seconds:
+            cs = conn.cursor()
+            try:
+                cs.execute("SELECT 1")
+                cs.fetchone()
+            except Exception as e:
+                logger.warning("Snowflake session failed health check: %s", e)
+                with self._cond:
+                    self.health_check_failures += 1
+                return False
+            finally:
+                cs.close()
+        return True
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SessionPool()
+            atexit.register(_pool.close_all)
+        return _pool
+
+
+@contextmanager
+def snowflake_session():
+    with get_pool().session() as conn:
+        yield conn
+
+
+def pool_stats():
+    return get_pool().stats()
@@ -1,28 +1,357 @@
+import logging
 import os
-from snowflake.connector import connect
+import shutil
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import chain
+
+import pandas as pd
 from dotenv import load_dotenv
+from utils.partitioning import run_tag
+from utils.pipeline import run_pipeline
+from utils.snowflake_session import get_pool
 
 load_dotenv()
 
-def upload_to_snowflake(df, table_name):
-    conn = connect(
-        user=os.getenv("SNOWFLAKE_USER"),
-        password=os.getenv("SNOWFLAKE_PASSWORD"),
-        account=os.getenv("SNOWFLAKE_ACCOUNT"),
-        warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
-        database=os.getenv("SNOWFLAKE_DATABASE"),
-        schema=os.getenv("SNOWFLAKE_SCHEMA")
-    )
-    cs = conn.cursor()
+logger = logging.getLogger(__name__)
+
+# "copy" PUTs files to a stage and loads them with one COPY INTO, "insert" is the old row-by-row path
+LOAD_METHOD = os.getenv("SNOWFLAKE_LOAD_METHOD", "copy")
+CHUNK_ROWS = int(os.getenv("SNOWFLAKE_CHUNK_ROWS", "250000"))
+PUT_THREADS = int(os.getenv("SNOWFLAKE_PUT_THREADS", "4"))
+FILE_FORMAT = os.getenv("SNOWFLAKE_FILE_FORMAT", "parquet")  # parquet or csv
+# extraction and upload overlap: batches waiting in the queue, and threads uploading them
+QUEUE_SIZE = int(os.getenv("SNOWFLAKE_QUEUE_SIZE", "2"))
+UPLOAD_THREADS = int(os.getenv("SNOWFLAKE_UPLOAD_THREADS", "1"))
+
+# replace swaps in a rebuilt table, append adds rows, merge upserts on key_columns
+LOAD_MODES = ("replace", "append", "merge")
+
+
+def upload_to_snowflake(df, table_name, mode="replace", key_columns=None, method=None,
+                        chunk_rows=None, put_threads=None, file_format=None, conn=None):
+    return upload_batches_to_snowflake([df], table_name, mode=mode, key_columns=key_columns,
+                                       method=method, chunk_rows=chunk_rows, put_threads=put_threads,
+                                       file_format=file_format, conn=conn)
+
+
+def upload_batches_to_snowflake(batches, table_name, mode="replace", key_columns=None, method=None,
+                                chunk_rows=None, put_threads=None, file_format=None, conn=None,
+                                queue_size=None, upload_threads=None, column_types=None):
+    # batches is any iterable (a generator too) of DataFrames or Arrow Tables/RecordBatches.
+    # the table schema comes from the first batch, except for columns typed in column_types
+    # ({column: snowflake type}). each batch uploads while the next one is read, so at most
+    # queue_size + upload_threads + 1 batches are held in memory
+    if mode not in LOAD_MODES:
+        raise ValueError(f"Unknown load mode: {mode}")
+    if mode == "merge" and not key_columns:
+        raise ValueError("merge mode requires key_columns")
+
+    load_options = dict(method=method, chunk_rows=chunk_rows, put_threads=put_threads,
+                        file_format=file_format)
+    load_table = None
+    columns = None
+    total_rows = 0
+    with snowflake_connection(conn) as conn:
+        cs = conn.cursor()
+        try:
+            batches = iter(batches)
+            first = next(batches, None)
+            if first is not None:
+                first = to_frame(first)
+                columns = list(first.columns)
+                load_table = prepare_target(cs, first, table_name, mode, column_types)
+
+                def upload(df):
+                    if len(df):
+                        # separate cursors of one session can run in parallel, and the
+                        # load table is visible to all of them
+                        load_frame(conn, df, load_table, **load_options)
+
+                timings = run_pipeline(chain([first], (to_frame(batch) for batch in batches)), upload,
+                                       queue_size=queue_size or QUEUE_SIZE,
+                                       workers=upload_threads or UPLOAD_THREADS)
+                total_rows = timings["rows"]
+                logger.info("%s load timings: %s", table_name, timings)
+            elif mode == "replace":
+                # an empty source empties the target so the last run's rows don't linger
+                # (its schema is kept; a missing table is left missing)
+                logger.warning("%s: no rows to load, emptying the target", table_name)
+                cs.execute(f"TRUNCATE TABLE IF EXISTS {table_name}")
+
+            if mode == "replace" and load_table is not None:
+                # every batch is in: swap the new table in and drop the old one with the load table
+                cs.execute(f"CREATE TABLE IF NOT EXISTS {table_name} LIKE {load_table}")
+                cs.execute(f"ALTER TABLE {table_name} SWAP WITH {load_table}")
+            elif mode == "merge" and load_table is not None:
+                cs.execute(merge_statement(table_name, load_table, columns, key_columns))
+        finally:
+            try:
+                if load_table not in (None, table_name):
+                    cs.execute(f"DROP TABLE IF EXISTS {load_table}")
+            finally:
+                cs.close()
+    return total_rows
+
+
+@contextmanager
+def snowflake_connection(conn=None):
+    # without conn a session is borrowed from the process-wide pool and discarded if the
+    # load fails (SessionPool.session); a conn passed in (e.g. the benchmarks' stand-in
+    # connector) is left open
+    if conn is not None:
+        yield conn
+        return
+    pool = get_pool()
+    with pool.session() as pooled:
+        yield pooled
+    logger.info("Snowflake session pool: %s", pool.stats())
+
+
+def publish_partitions(table_name, part_tables, mode="replace", key_columns=None, conn=None, run_id=None):
+    # publishes partitions loaded in parallel in one step: a SWAP for replace, a single
+    # INSERT/MERGE for append and merge - both atomic. the publish table is named after
+    # run_id (random without one), so concurrent runs don't collide
+    if mode not in LOAD_MODES:
+        raise ValueError(f"Unknown load mode: {mode}")
+    if mode == "merge" and not key_columns:
+        raise ValueError("merge mode requires key_columns")
+    if not part_tables and mode != "replace":
+        return
+
+    with snowflake_connection(conn) as conn:
+        cs = conn.cursor()
+        try:
+            if not part_tables:
+                # every partition was empty, so the source is: empty the target like
+                # upload_batches_to_snowflake does instead of keeping the last run's rows
+                logger.warning("%s: no partitions to publish, emptying the target", table_name)
+                cs.execute(f"TRUNCATE TABLE IF EXISTS {table_name}")
+                return
+            union = " UNION ALL ".join(f"SELECT * FROM {part}" for part in part_tables)
+            if mode == "replace":
+                publish_table = f"{table_name}_publish_{run_tag(run_id) if run_id else uuid.uuid4().hex[:10]}"
+                cs.execute(f"CREATE OR REPLACE TABLE {publish_table} AS {union}")
+                cs.execute(f"CREATE TABLE IF NOT EXISTS {table_name} LIKE {publish_table}")
+                cs.execute(f"ALTER TABLE {table_name} SWAP WITH {publish_table}")
+                cs.execute(f"DROP TABLE IF EXISTS {publish_table}")
+            else:
+                cs.execute(f"CREATE TABLE IF NOT EXISTS {table_name} LIKE {part_tables[0]}")
+                if mode == "append":
+                    cs.execute(f"INSERT INTO {table_name} {union}")
+                else:
+                    cs.execute(f"SELECT * FROM {part_tables[0]} LIMIT 0")
+                    columns = [col[0] for col in cs.description]
+                    # Snowflake returns column names in upper case
+                    keys = [key.upper() for key in key_columns]
+                    cs.execute(merge_statement(table_name, f"({union})", columns, keys))
+
+            for part in part_tables:
+                cs.execute(f"DROP TABLE IF EXISTS {part}")
+        finally:
+            cs.close()
+
+
+def prepare_target(cs, df, table_name, mode, column_types=None):
+    # returns the name of the table the batches are written to
+    columns_with_types = column_definitions(df, column_types)
+    if mode == "replace":
+        # batches load into a table of their own that replaces the target only once all of
+        # them are in, so a load failing part way leaves readers with the previous table
+        load_table = f"{table_name}_load_{uuid.uuid4().hex[:8]}"
+        cs.execute(f"CREATE TABLE {load_table} ({columns_with_types})")
+        return load_table
+    cs.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({columns_with_types})")
+    if mode == "append":
+        return table_name
+    # rows land in a temporary table first, then only changed rows are MERGEd
+    temp_table = f"{table_name}_stage_{uuid.uuid4().hex[:8]}"
+    cs.execute(f"CREATE TEMPORARY TABLE {temp_table} ({columns_with_types})")
+    return temp_table
+
+
+def to_frame(batch):
+    if isinstance(batch, pd.DataFrame):
+        return batch
+    # pyarrow.Table / RecordBatch
+    return batch.to_pandas()
+
+
+def snowflake_type(series):
+    dtype = series.dtype
+    if isinstance(dtype, pd.ArrowDtype):
+        return arrow_to_snowflake_type(dtype.pyarrow_dtype)
+    if pd.api.types.is_bool_dtype(dtype):
+        return "BOOLEAN"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "NUMBER(38,0)"
+    if pd.api.types.is_float_dtype(dtype):
+        return "FLOAT"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "TIMESTAMP_NTZ"
+    if pd.api.types.is_object_dtype(dtype):
+        # read_sql returns dates as datetime.date objects
+        inferred = pd.api.types.infer_dtype(series, skipna=True)
+        return {
+            "date": "DATE",
+            "datetime": "TIMESTAMP_NTZ",
+            "datetime64": "TIMESTAMP_NTZ",
+            "boolean": "BOOLEAN",
+            "integer": "NUMBER(38,0)",
+            "floating": "FLOAT",
+            "mixed-integer-float": "FLOAT",
+            "decimal": "NUMBER(38,10)",
+        }.get(inferred, "STRING")
+    return "STRING"
+
+
+def arrow_to_snowflake_type(arrow_type):
+    import pyarrow as pa
+
+    if pa.types.is_boolean(arrow_type):
+        return "BOOLEAN"
+    if pa.types.is_integer(arrow_type):
+        return "NUMBER(38,0)"
+    if pa.types.is_floating(arrow_type):
+        return "FLOAT"
+    if pa.types.is_decimal(arrow_type):
+        return f"NUMBER({arrow_type.precision},{arrow_type.scale})"
+    if pa.types.is_date(arrow_type):
+        return "DATE"
+    if pa.types.is_timestamp(arrow_type):
+        return "TIMESTAMP_NTZ"
+    return "STRING"
+
+
+def column_definitions(df, column_types=None):
+    column_types = column_types or {}
+    return ", ".join(f"{col} {column_types.get(col) or snowflake_type(df[col])}" for col in df.columns)
+
+
+def sample_column_types(sample):
+    # {column: snowflake type} from one non-null value per column ({column: value}, None
+    # where the column has no value at all). partition tables are created with these types
+    # instead of each inferring its own from its first batch, where a column that happens
+    # to be NULL throughout would come out as STRING and break the UNION ALL on publish
+    return {col: snowflake_type(pd.Series([value], dtype=object)) for col, value in sample.items()}
+
+
+def merge_statement(table_name, source_table, columns, key_columns):
+    columns = list(columns)
+    value_columns = [col for col in columns if col not in key_columns]
+    on_clause = " AND ".join(f"t.{col} = s.{col}" for col in key_columns)
+    insert_columns = ", ".join(columns)
+    insert_values = ", ".join(f"s.{col}" for col in columns)
+
+    sql = f"MERGE INTO {table_name} t USING {source_table} s ON {on_clause}"
+    if value_columns:
+        # only rows that actually changed are updated
+        changed = " OR ".join(f"t.{col} IS DISTINCT FROM s.{col}" for col in value_columns)
+        updates = ", ".join(f"t.{col} = s.{col}" for col in value_columns)
+        sql += f" WHEN MATCHED AND ({changed}) THEN UPDATE SET {updates}"
+    sql += f" WHEN NOT MATCHED THEN INSERT ({insert_columns}) VALUES ({insert_values})"
+    return sql
+
+
+def load_frame(conn, df, table_name, method=None, chunk_rows=None, put_threads=None, file_format=None):
+    method = method or LOAD_METHOD
+    if method == "copy":
+        copy_into_table(conn, df, table_name, chunk_rows, put_threads, file_format)
+    elif method == "insert":
+        cs = conn.cursor()
+        try:
+            insert_rows(cs, df, table_name)
+        finally:
+            cs.close()
+    else:
+        raise ValueError(f"Unknown load method: {method}")
+
+
+def to_python(value):
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    return value
+
+
+def insert_rows(cs, df, table_name):
+    # insert the rows (one round trip per row). values are sent as bind
+    # parameters so NULLs and types survive
+    placeholders = ", ".join(["%s"] * len(df.columns))
+    sql = f"INSERT INTO {table_name} ({', '.join(df.columns)}) VALUES ({placeholders})"
+    rows = df.astype(object).where(df.notna(), None)
+    for row in rows.itertuples(index=False, name=None):
+        cs.execute(sql, tuple(to_python(x) for x in row))
+
+
+def copy_into_table(conn, df, table_name, chunk_rows=None, put_threads=None, file_format=None):
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    put_threads = put_threads or PUT_THREADS
+    file_format = (file_format or FILE_FORMAT).lower()
+
+    # every load gets its own folder in the user stage: temporary tables have no
+    # table stage, and COPY never reloads files from an earlier load
+    stage_path = f"@~/etl/{table_name}/load_{uuid.uuid4().hex}"
+    tmp_dir = tempfile.mkdtemp(prefix=f"{table_name}_")
     try:
-        # Ustun nomlarini STRING turida yaratish
-        columns_with_types = ", ".join(f"{col} STRING" for col in df.columns)
-        cs.execute(f"CREATE OR REPLACE TABLE {table_name} ({columns_with_types})")
-
-        # Ma'lumotlarni kiritish
-        for _, row in df.iterrows():
-            values = "', '".join(str(x).replace("'", "''") for x in row.tolist())  # SQL injection oldini olish
-            cs.execute(f"INSERT INTO {table_name} VALUES ('{values}')")
+        files = write_chunk_files(df, tmp_dir, chunk_rows, file_format)
+        if not files:
+            return
+
+        def put_file(path):
+            cur = conn.cursor()
+            try:
+                cur.execute(
+                    f"PUT 'file://{path}' {stage_path} "
+                    f"AUTO_COMPRESS=FALSE OVERWRITE=TRUE PARALLEL=1"
+                )
+            finally:
+                cur.close()
+
+        with ThreadPoolExecutor(max_workers=put_threads) as pool:
+            list(pool.map(put_file, files))
+
+        cs = conn.cursor()
+        try:
+            cs.execute(f"COPY INTO {table_name} FROM {stage_path} "
+                       f"FILE_FORMAT = ({copy_file_format(file_format)}) "
+                       f"{copy_options(file_format)} PURGE = TRUE")
+        finally:
+            cs.close()
     finally:
-        cs.close()
-        conn.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def write_chunk_files(df, tmp_dir, chunk_rows, file_format):
+    files = []
+    for i, start in enumerate(range(0, len(df), chunk_rows)):
+        chunk = df.iloc[start:start + chunk_rows]
+        if file_format == "parquet":
+            path = os.path.join(tmp_dir, f"chunk_{i:05d}.parquet")
+            # Snowflake cannot read nanosecond parquet timestamps
+            chunk.to_parquet(path, index=False, compression="snappy",
+                             coerce_timestamps="us", allow_truncated_timestamps=True)
+        elif file_format == "csv":
+            path = os.path.join(tmp_dir, f"chunk_{i:05d}.csv.gz")
+            chunk.to_csv(path, index=False, compression="gzip")
+        else:
+            raise ValueError(f"Unknown file format: {file_format}")
+        files.append(path)
+    return files
+
+
+def copy_file_format(file_format):
+    if file_format == "parquet":
+        return "TYPE = PARQUET USE_LOGICAL_TYPE = TRUE"
+    return "TYPE = CSV COMPRESSION = GZIP SKIP_HEADER = 1 FIELD_OPTIONALLY_ENCLOSED_BY = '\"'"
+
+
+def copy_options(file_format):
+    if file_format == "parquet":
+        return "MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE"
+    return ""
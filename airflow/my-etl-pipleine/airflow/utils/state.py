@@ -0,0 +1,30 @@
+import json
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# JSON files for the small bits of state kept between runs (watermarks, fingerprints)
+STATE_DIR = os.getenv("ETL_STATE_DIR", "/opt/airflow/data/state")
+
+
+def state_path(name):
+    return os.path.join(STATE_DIR, f"{name}.json")
+
+
+def load_state(name, default=None):
+    try:
+        with open(state_path(name)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def save_state(name, value):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    path = state_path(name)
+    # write to a temporary file and then rename it, so a crash never leaves half-written state
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(value, f)
+    os.replace(tmp_path, path)
@@ -4,11 +4,14 @@
 # =============================================================================
 
 import os
+import uuid
 import logging
+import threading
 import pandas as pd
-from typing import Dict, Any
-from datetime import datetime
+from typing import Dict, Any, Callable, Iterable, List, Optional
+from datetime import datetime, timedelta
 from google.cloud import bigquery
+from google.api_core.exceptions import NotFound
 
 logger = logging.getLogger(__name__)
 
@@ -21,8 +24,23 @@ DATASET_MAPPING = {
 }
 METADATA_DATASET = "data_quality_metadata"
 
+# One client per process: it is thread-safe and reuses its HTTP connections,
+# so concurrent table pipelines share it instead of building their own.
+_client = None
+_client_lock = threading.Lock()
+_known_tables = set()
+
+def get_bigquery_client() -> bigquery.Client:
+    """Return the process-wide BigQuery client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = bigquery.Client(project=PROJECT_ID)
+        return _client
+
 def load_to_bigquery(data: pd.DataFrame, data_source: str, table_name: str,
-             environment: str, pipeline_level: str, validation_results: Dict[str, Any]) -> Dict[str, Any]:
+             environment: str, pipeline_level: str, validation_results: Dict[str, Any],
+             write_disposition: str = bigquery.WriteDisposition.WRITE_TRUNCATE) -> Dict[str, Any]:
     """
     Load data to BigQuery with metadata columns.
 
@@ -33,12 +51,13 @@ def load_to_bigquery(data: pd.DataFrame, data_source: str, table_name: str,
         environment: Environment (dev, staging, prod)
         pipeline_level: Pipeline level (raw, cleaned, etc.)
         validation_results: Results from data validation
+        write_disposition: WRITE_TRUNCATE for full loads, WRITE_APPEND for incremental ones
 
     Returns:
         Dictionary with load results
     """
     try:
-        client = bigquery.Client(project=PROJECT_ID)
+        client = get_bigquery_client()
 
         # Determine target table
         dataset_name = DATASET_MAPPING.get(environment, "data_dev")
@@ -56,7 +75,7 @@ def load_to_bigquery(data: pd.DataFrame, data_source: str, table_name: str,
 
         # Configure load job
         job_config = bigquery.LoadJobConfig(
-            write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+            write_disposition=write_disposition,
             autodetect=True
         )
 
@@ -84,6 +103,220 @@ def load_to_bigquery(data: pd.DataFrame, data_source: str, table_name: str,
         logger.error(f"BigQuery load failed: {e}")
         return {"success": False, "error": str(e)}
 
+def load_batches_to_bigquery(batches: Iterable[pd.DataFrame], data_source: str, table_name: str,
+                             environment: str, pipeline_level: str,
+                             validation_results: Callable[[Dict[str, Any]], Dict[str, Any]],
+                             write_disposition: str = bigquery.WriteDisposition.WRITE_TRUNCATE,
+                             unique_checks: Optional[Dict[str, List[str]]] = None,
+                             merge_keys: Optional[List[str]] = None,
+                             order_column: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load a stream of DataFrame chunks to BigQuery as one logical load.
+
+    Each chunk is appended to a staging table as it arrives, so only one chunk is
+    held in memory. Once the stream is exhausted a single query job writes the
+    staging rows, plus the validation columns, to the target table; the target
+    is untouched if any chunk fails.
+
+    With merge_keys the staged rows are merged into an existing target instead:
+    rows with a matching key are updated and the rest inserted, so loading the
+    same rows twice leaves one copy. Within the staged rows the latest by
+    order_column wins.
+
+    Every chunk is loaded with the same schema: the existing target's when
+    appending or merging, otherwise the one detected from the first chunk. A later chunk
+    whose values do not fit (say, a float in an INTEGER column) fails the load
+    instead of changing the column's type.
+
+    Args:
+        batches: DataFrame chunks to load
+        data_source: Source system name
+        table_name: Table name
+        environment: Environment (dev, staging, prod)
+        pipeline_level: Pipeline level (raw, cleaned, etc.)
+        validation_results: Called after the last chunk with the duplicate counts
+            (see count_staged_duplicates) to get the validation results
+        write_disposition: How the staged rows are written to the target
+        unique_checks: Column groups, by check name, that must be unique
+        merge_keys: Key columns to MERGE on; write_disposition is then only used
+            to create a target that does not exist yet
+        order_column: Column picking the latest of several staged rows per key
+
+    Returns:
+        Dictionary with load results
+    """
+    try:
+        client = get_bigquery_client()
+
+        # Determine target and staging tables
+        dataset_name = DATASET_MAPPING.get(environment, "data_dev")
+        full_table_name = f"{data_source}_{table_name}_{pipeline_level}"
+        table_id = f"{PROJECT_ID}.{dataset_name}.{full_table_name}"
+        staging_id = f"{PROJECT_ID}.{dataset_name}._staging_{full_table_name}_{uuid.uuid4().hex[:8]}"
+        ingestion_timestamp = datetime.utcnow()
+        schema = None
+        if merge_keys or write_disposition != bigquery.WriteDisposition.WRITE_TRUNCATE:
+            schema = get_target_schema(client, table_id)
+        merge = bool(merge_keys) and schema is not None
+
+        chunks = 0
+        try:
+            for batch in batches:
+                if batch.empty:
+                    continue
+                chunk = batch.assign(
+                    _ingestion_timestamp=ingestion_timestamp,
+                    _data_source=data_source,
+                    _environment=environment,
+                    _pipeline_level=pipeline_level
+                )
+                job_config = bigquery.LoadJobConfig(
+                    write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+                    schema=schema,
+                    autodetect=schema is None
+                )
+                client.load_table_from_dataframe(chunk, staging_id, job_config=job_config).result()
+                chunks += 1
+                logger.info(f"Loaded chunk {chunks} ({len(chunk)} rows) to {staging_id}")
+
+                if chunks == 1:
+                    # Leftovers from a crashed run clean themselves up
+                    staging = client.get_table(staging_id)
+                    staging.expires = datetime.utcnow() + timedelta(days=1)
+                    client.update_table(staging, ["expires"])
+                    schema = schema or staging.schema
+
+            if chunks == 0:
+                validation_results({"rows": 0, "unique": {}})
+                logger.warning(f"No rows to load to {table_id}")
+                if not merge_keys and write_disposition == bigquery.WriteDisposition.WRITE_TRUNCATE:
+                    # A full load of an empty source leaves an empty target, not the last run's rows
+                    truncate_table(client, table_id)
+                return {"success": True, "table_id": table_id, "rows_loaded": 0, "bytes_loaded": 0,
+                        "chunks": 0, "load_timestamp": datetime.utcnow().isoformat()}
+
+            validation = validation_results(count_staged_duplicates(client, staging_id, unique_checks or {}))
+
+            # Commit: one job writes everything staged to the target
+            query_parameters = [
+                bigquery.ScalarQueryParameter("score", "FLOAT64", validation.get("data_quality_score", 0)),
+                bigquery.ScalarQueryParameter("passed", "BOOL", validation.get("success", False)),
+            ]
+            if merge:
+                staged_columns = [field.name for field in client.get_table(staging_id).schema]
+                client.query(
+                    build_merge_query(table_id, staging_id, staged_columns, merge_keys, order_column),
+                    job_config=bigquery.QueryJobConfig(query_parameters=query_parameters)
+                ).result()
+            else:
+                job_config = bigquery.QueryJobConfig(
+                    destination=table_id,
+                    write_disposition=write_disposition,
+                    query_parameters=query_parameters
+                )
+                client.query(
+                    f"SELECT *, @score AS _data_quality_score, @passed AS _validation_passed FROM `{staging_id}`",
+                    job_config=job_config
+                ).result()
+        finally:
+            client.delete_table(staging_id, not_found_ok=True)
+
+        table = client.get_table(table_id)
+        logger.info(f"Successfully loaded {table.num_rows} rows in {chunks} chunks to {table_id}")
+        return {
+            "success": True,
+            "table_id": table_id,
+            "rows_loaded": table.num_rows,
+            "bytes_loaded": table.num_bytes,
+            "chunks": chunks,
+            "load_timestamp": datetime.utcnow().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"BigQuery chunked load failed: {e}")
+        return {"success": False, "error": str(e)}
+
+def build_merge_query(table_id: str, staging_id: str, columns: List[str], merge_keys: List[str],
+                      order_column: Optional[str] = None) -> str:
+    """
+    MERGE statement upserting the staged rows, plus validation columns, into the target on merge_keys.
+
+    Staged rows sharing a key are reduced to the latest by order_column so that
+    each target row matches at most one source row.
+    """
+    missing = [key for key in merge_keys if key not in columns]
+    if missing:
+        raise ValueError(f"Merge key columns {missing} not in {staging_id}")
+
+    quote = lambda column: f"`{column}`"
+    order = quote(order_column if order_column in columns else "_ingestion_timestamp")
+    all_columns = columns + ["_data_quality_score", "_validation_passed"]
+    on = " AND ".join(f"t.{quote(key)} IS NOT DISTINCT FROM s.{quote(key)}" for key in merge_keys)
+    updates = ", ".join(f"{quote(column)} = s.{quote(column)}" for column in all_columns if column not in merge_keys)
+    return f"""
+        MERGE `{table_id}` AS t
+        USING (
+            SELECT *, @score AS _data_quality_score, @passed AS _validation_passed
+            FROM `{staging_id}`
+            WHERE TRUE
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY {", ".join(map(quote, merge_keys))} ORDER BY {order} DESC) = 1
+        ) AS s
+        ON {on}
+        WHEN MATCHED THEN
+            UPDATE SET {updates}
+        WHEN NOT MATCHED THEN
+            INSERT ({", ".join(map(quote, all_columns))})
+            VALUES ({", ".join(f"s.{quote(column)}" for column in all_columns)})
+    """
+
+def truncate_table(client: bigquery.Client, table_id: str):
+    """Delete every row of a table, keeping its schema; a missing table is left missing."""
+    try:
+        client.get_table(table_id)
+    except NotFound:
+        return
+    client.query(f"TRUNCATE TABLE `{table_id}`").result()
+    logger.info(f"Truncated {table_id}")
+
+def get_target_schema(client: bigquery.Client, table_id: str) -> Optional[List[bigquery.SchemaField]]:
+    """Schema of an existing target without the validation columns, or None if it does not exist."""
+    try:
+        table = client.get_table(table_id)
+    except NotFound:
+        return None
+    validation_columns = {"_data_quality_score", "_validation_passed"}
+    return [field for field in table.schema if field.name not in validation_columns]
+
+def count_staged_duplicates(client: bigquery.Client, staging_id: str,
+                            unique_checks: Dict[str, List[str]]) -> Dict[str, Any]:
+    """
+    Count duplicate rows and duplicate unique-key values in a staging table.
+
+    Counting in BigQuery sees the whole table at once, so it is exact without
+    holding any rows or hashes in the service. The metadata columns are the
+    same for every row of one load and do not affect the row count.
+
+    Returns:
+        {"rows": duplicate rows, "unique": {check name: duplicate values}}
+    """
+    present = {field.name for field in client.get_table(staging_id).schema}
+    checks = {name: columns for name, columns in unique_checks.items()
+              if all(column in present for column in columns)}
+    for name in unique_checks.keys() - checks.keys():
+        logger.warning(f"Skipping uniqueness check {name}: column missing from {staging_id}")
+
+    # Like pandas duplicated(), NULLs count as equal to each other
+    selects = ["COUNT(*) - COUNT(DISTINCT TO_JSON_STRING(t)) AS rows_"]
+    for i, columns in enumerate(checks.values()):
+        key = ", ".join(f"t.`{column}`" for column in columns)
+        selects.append(f"COUNT(*) - COUNT(DISTINCT TO_JSON_STRING(STRUCT({key}))) AS check_{i}")
+    row = next(iter(client.query(f"SELECT {', '.join(selects)} FROM `{staging_id}` AS t").result()))
+
+    return {
+        "rows": row["rows_"],
+        "unique": {name: row[f"check_{i}"] for i, name in enumerate(checks)}
+    }
+
 def log_metadata(data_source: str, table_name: str, environment: str, pipeline_level: str,
                  validation_results: Dict[str, Any], load_results: Dict[str, Any]):
     """Log all monitoring metadata to BigQuery tables."""
@@ -101,7 +334,7 @@ def log_metadata(data_source: str, table_name: str, environment: str, pipeline_l
 def log_pipeline_execution(data_source: str, table_name: str, environment: str, pipeline_level: str,
                            validation_results: Dict[str, Any], load_results: Dict[str, Any]):
     """Log pipeline execution summary."""
-    client = bigquery.Client(project=PROJECT_ID)
+    client = get_bigquery_client()
     table_id = f"{PROJECT_ID}.{METADATA_DATASET}.pipeline_executions"
 
     ensure_metadata_table_exists(client, table_id, get_pipeline_execution_schema())
@@ -125,7 +358,7 @@ def log_pipeline_execution(data_source: str, table_name: str, environment: str,
 def log_null_monitoring(data_source: str, table_name: str, environment: str, pipeline_level: str,
                        validation_results: Dict[str, Any]):
     """Log null value monitoring results."""
-    client = bigquery.Client(project=PROJECT_ID)
+    client = get_bigquery_client()
     table_id = f"{PROJECT_ID}.{METADATA_DATASET}.null_monitoring"
 
     ensure_metadata_table_exists(client, table_id, get_null_monitoring_schema())
@@ -152,7 +385,7 @@ def log_null_monitoring(data_source: str, table_name: str, environment: str, pip
 def log_duplicate_monitoring(data_source: str, table_name: str, environment: str, pipeline_level: str,
                              validation_results: Dict[str, Any]):
     """Log duplicate monitoring results."""
-    client = bigquery.Client(project=PROJECT_ID)
+    client = get_bigquery_client()
     table_id = f"{PROJECT_ID}.{METADATA_DATASET}.duplicate_monitoring"
 
     ensure_metadata_table_exists(client, table_id, get_duplicate_monitoring_schema())
@@ -176,7 +409,7 @@ def log_duplicate_monitoring(data_source: str, table_name: str, environment: str
 def log_custom_checks(data_source: str, table_name: str, environment: str, pipeline_level: str,
                       validation_results: Dict[str, Any]):
     """Log custom Great Expectations checks."""
-    client = bigquery.Client(project=PROJECT_ID)
+    client = get_bigquery_client()
     table_id = f"{PROJECT_ID}.{METADATA_DATASET}.custom_checks"
 
     ensure_metadata_table_exists(client, table_id, get_custom_checks_schema())
@@ -201,12 +434,15 @@ def log_custom_checks(data_source: str, table_name: str, environment: str, pipel
         
 def ensure_metadata_table_exists(client: bigquery.Client, table_id: str, schema: list):
     """Ensure metadata table exists with proper schema."""
+    if table_id in _known_tables:
+        return
     try:
         client.get_table(table_id)
     except:
         # Table doesn't exist, create it
         table = bigquery.Table(table_id, schema=schema)
-        table = client.create_table(table)
+        table = client.create_table(table, exists_ok=True)
+    _known_tables.add(table_id)
 
 def get_pipeline_execution_schema():
     """Schema for pipeline execution tracking table."""
@@ -0,0 +1,127 @@
+# ==============================================================================
+# dedup.py
+# Suppresses Pub/Sub redeliveries of messages that are running or already done.
+# ==============================================================================
+
+import os
+import time
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+DEDUP_TTL_SECONDS = int(os.getenv("DEDUP_TTL_SECONDS", str(24 * 3600)))
+DEDUP_IN_FLIGHT_TTL_SECONDS = int(os.getenv("DEDUP_IN_FLIGHT_TTL_SECONDS", "3600"))
+DEDUP_MAX_ENTRIES = int(os.getenv("DEDUP_MAX_ENTRIES", "10000"))
+DEDUP_SQLITE_PATH = os.getenv("DEDUP_SQLITE_PATH")  # unset keeps the cache in memory only
+
+IN_FLIGHT = "in_flight"
+DONE = "done"
+
+
+class DedupCache:
+    """
+    TTL/LRU cache of message IDs that are in flight or finished successfully.
+
+    Only finished messages are persisted to SQLite: an in-flight entry left
+    behind by a crashed process must not block the redelivery that retries it.
+    """
+
+    def __init__(self, ttl_seconds: int = DEDUP_TTL_SECONDS,
+                 in_flight_ttl_seconds: int = DEDUP_IN_FLIGHT_TTL_SECONDS,
+                 max_entries: int = DEDUP_MAX_ENTRIES, sqlite_path: Optional[str] = DEDUP_SQLITE_PATH):
+        self.ttl_seconds = ttl_seconds
+        self.in_flight_ttl_seconds = in_flight_ttl_seconds
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # message_id -> (state, expires_at)
+        self.lock = threading.Lock()
+        self.suppressed = 0
+        self.db = None
+        if sqlite_path:
+            self.db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS processed_messages (message_id TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+            )
+            self.db.execute("DELETE FROM processed_messages WHERE expires_at < ?", (time.time(),))
+            self.db.commit()
+
+    def begin(self, message_id: str) -> Optional[str]:
+        """
+        Claim a message for processing.
+
+        Returns:
+            None if the caller should process it, otherwise the state of the
+            earlier delivery: DONE (safe to ack) or IN_FLIGHT (may still fail,
+            so the redelivery must not be acked)
+        """
+        now = time.time()
+        with self.lock:
+            state = self._lookup(message_id, now)
+            if state:
+                self.suppressed += 1
+                logger.info(f"Suppressed duplicate message {message_id} ({state})")
+                return state
+            self._put(message_id, IN_FLIGHT, now + self.in_flight_ttl_seconds)
+            return None
+
+    def finish(self, message_id: str, success: bool):
+        """Mark a claimed message done, or release it on failure so a redelivery retries it."""
+        with self.lock:
+            if not success:
+                self.entries.pop(message_id, None)
+                return
+            expires_at = time.time() + self.ttl_seconds
+            self._put(message_id, DONE, expires_at)
+            if self.db:
+                self.db.execute("INSERT OR REPLACE INTO processed_messages VALUES (?, ?)", (message_id, expires_at))
+                self.db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Suppressed duplicate count and cached entries by state."""
+        with self.lock:
+            in_flight = sum(1 for state, _ in self.entries.values() if state == IN_FLIGHT)
+            return {
+                "suppressed_duplicates": self.suppressed,
+                "in_flight": in_flight,
+                "done": len(self.entries) - in_flight,
+                "persistent": self.db is not None,
+            }
+
+    def _lookup(self, message_id: str, now: float) -> Optional[str]:
+        entry = self.entries.get(message_id)
+        if entry:
+            state, expires_at = entry
+            if expires_at > now:
+                self.entries.move_to_end(message_id)
+                return state
+            del self.entries[message_id]
+        if self.db:
+            row = self.db.execute(
+                "SELECT expires_at FROM processed_messages WHERE message_id = ?", (message_id,)
+            ).fetchone()
+            if row and row[0] > now:
+                self._put(message_id, DONE, row[0])
+                return DONE
+        return None
+
+    def _put(self, message_id: str, state: str, expires_at: float):
+        self.entries[message_id] = (state, expires_at)
+        self.entries.move_to_end(message_id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+_dedup_cache = None
+_dedup_cache_lock = threading.Lock()
+
+
+def get_dedup_cache() -> DedupCache:
+    """Process-wide DedupCache, created on first use."""
+    global _dedup_cache
+    with _dedup_cache_lock:
+        if _dedup_cache is None:
+            _dedup_cache = DedupCache()
+        return _dedup_cache
@@ -4,15 +4,55 @@
 # =============================================================================
 
 import os
+import time
+import random
 import logging
+import threading
+import email.utils
 import pandas as pd
 import requests
-from typing import Dict, Any
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from datetime import datetime, timezone
 from logging_utils import get_logger
 
+try:
+    import ijson
+except ImportError:  # listed in requirements.txt; only streamed extraction (stream=true) needs it
+    ijson = None
+
 logger = get_logger(__name__)
 
+# Pagination: "offset", "cursor", "link" or "none" (one request); a message may override it
+PAGINATION = os.getenv("source_API_PAGINATION", "none")
+PAGE_SIZE = int(os.getenv("source_API_PAGE_SIZE", "1000"))
+MAX_PAGES = int(os.getenv("source_API_MAX_PAGES", "10000"))  # more pages than this fails the extraction
+MAX_CONCURRENCY = int(os.getenv("source_API_MAX_CONCURRENCY", "4"))  # offset pages in flight
+OFFSET_PARAM = os.getenv("source_API_OFFSET_PARAM", "offset")
+LIMIT_PARAM = os.getenv("source_API_LIMIT_PARAM", "limit")
+CURSOR_PARAM = os.getenv("source_API_CURSOR_PARAM", "cursor")
+CURSOR_FIELD = os.getenv("source_API_CURSOR_FIELD", "next_cursor")  # dotted path in the body
+
+# Retries
+REQUEST_TIMEOUT = int(os.getenv("source_API_TIMEOUT", "60"))
+MAX_RETRIES = int(os.getenv("source_API_MAX_RETRIES", "5"))
+BACKOFF_SECONDS = float(os.getenv("source_API_BACKOFF_SECONDS", "1"))
+MAX_BACKOFF_SECONDS = float(os.getenv("source_API_MAX_BACKOFF_SECONDS", "60"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Streaming mode: decode records incrementally into DataFrames of BATCH_ROWS rows
+STREAM_RESPONSES = os.getenv("source_API_STREAM", "false")
+BATCH_ROWS = int(os.getenv("source_API_BATCH_ROWS", "50000"))
+STREAM_PEEK_BYTES = 1024  # read ahead to tell a top-level array from a {"data": [...]} object
+
+# The API has no last-modified filter, so the handler always runs full loads against it
+SUPPORTS_INCREMENTAL = False
+
+_session = None
+_session_pool_size = 0
+_session_lock = threading.Lock()
+
 def extract_data(data_source: str, table_name: str, environment: str, **kwargs) -> Dict[str, Any]:
     """
     Extract data from source.
@@ -40,64 +80,346 @@ def extract_data(data_source: str, table_name: str, environment: str, **kwargs)
         return {"success": False, "error": str(e)}
 
 def extract_source_data(table_name: str, environment: str, **kwargs) -> Dict[str, Any]:
-    """Extract data from source API."""
+    """
+    Extract data from source API.
+
+    Pages are requested according to `pagination` (message param, default
+    source_API_PAGINATION): "offset" (offset/limit, fetched concurrently),
+    "cursor" (next-page token in the body), "link" (RFC 5988 Link header) or
+    "none" for a single request.
+    """
     try:
         # Get source configuration
         api_base_url = os.getenv("source_API_URL")
         api_key = os.getenv("source_API_KEY")
         username = os.getenv("source_USERNAME")
         password = os.getenv("source_PASSWORD")
-        
-    if not all([api_base_url, api_key]):
-        raise ValueError("source API credentials not configured")
-
-    # Build API endpoint
-    endpoint = f"{api_base_url}/{table_name}"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-
-    # Add any query parameters from kwargs
-    params = {k: v for k, v in kwargs.items() if k.startswith("param_")}
-
-    logger.info(f"Calling source API: {endpoint}")
-    response = requests.get(
-        endpoint,
-        headers=headers,
-        params=params,
-        auth=(username, password) if username else None,
-        timeout=300
-    )
-    response.raise_for_status()
-
-    # Parse response
-    data = response.json()
-    
-    # Convert to DataFrame
-    if isinstance(data, dict) and "data" in data:
-        df = pd.DataFrame(data["data"])
-    elif isinstance(data, list):
-        df = pd.DataFrame(data)
-    else:
-        df = pd.DataFrame([data])
-
-    logger.info(f"Successfully extracted {len(df)} rows from source")
-
-    return {
-        "success": True,
-        "data": df,
-        "rows_extracted": len(df),
-        "extraction_timestamp": datetime.utcnow(),
-        "source_metadata": {
-            "endpoint": endpoint,
-            "response_size_bytes": len(response.content)
+
+        if not all([api_base_url, api_key]):
+            raise ValueError("source API credentials not configured")
+
+        # Build API endpoint
+        endpoint = f"{api_base_url}/{table_name}"
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        max_concurrency = int(kwargs.get("max_concurrency", MAX_CONCURRENCY))
+        session = get_session(headers, (username, password) if username else None, max_concurrency)
+
+        # Add any query parameters from kwargs
+        params = {k: v for k, v in kwargs.items() if k.startswith("param_")}
+
+        pagination = kwargs.get("pagination", PAGINATION)
+        page_size = int(kwargs.get("page_size", PAGE_SIZE))
+        logger.info(f"Calling source API: {endpoint} ({pagination} pagination)")
+
+        if str(kwargs.get("stream", STREAM_RESPONSES)).lower() in ("true", "1", "yes"):
+            # Decoding whole bodies would defeat the point of streaming, so there is no fallback
+            if ijson is None:
+                raise ValueError("Streamed extraction (stream=true) needs the ijson package; see requirements.txt")
+
+            # Records are decoded as the body arrives; nothing is fetched until the batches are iterated
+            batch_rows = int(kwargs.get("batch_rows", BATCH_ROWS))
+            return {
+                "success": True,
+                "streaming": True,
+                "batches": stream_batches(session, endpoint, params, pagination, page_size, batch_rows),
+                "extraction_timestamp": datetime.utcnow(),
+                "source_metadata": {
+                    "endpoint": endpoint,
+                    "batch_rows": batch_rows
+                }
+            }
+
+        if pagination == "offset":
+            pages = fetch_offset_pages(session, endpoint, params, page_size, max_concurrency)
+        elif pagination == "cursor":
+            pages = fetch_cursor_pages(session, endpoint, params, page_size)
+        elif pagination == "link":
+            pages = fetch_link_pages(session, endpoint, params, page_size)
+        elif pagination == "none":
+            response = request_with_retry(session, endpoint, params)
+            pages = [(records_from_payload(response.json()), len(response.content))]
+        else:
+            raise ValueError(f"Unknown pagination style: {pagination}")
+
+        # Concatenate pages into one DataFrame
+        frames = [pd.DataFrame(records) for records, _ in pages if records]
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+        logger.info(f"Successfully extracted {len(df)} rows in {len(pages)} pages from source")
+
+        return {
+            "success": True,
+            "data": df,
+            "rows_extracted": len(df),
+            "extraction_timestamp": datetime.utcnow(),
+            "source_metadata": {
+                "endpoint": endpoint,
+                "pages": len(pages),
+                "response_size_bytes": sum(size for _, size in pages)
+            }
         }
-    }
 
     except requests.exceptions.RequestException as e:
         logger.error(f"source API request failed: {e}")
         return {"success": False, "error": f"API request failed: {str(e)}"}
     except Exception as e:
         logger.error(f"source extraction failed: {e}")
-        return {"success": False, "error":str(e)}
\ No newline at end of file
+        return {"success": False, "error":str(e)}
+
+def get_session(headers: Dict[str, str], auth: Optional[Tuple[str, str]] = None,
+                max_concurrency: int = MAX_CONCURRENCY) -> requests.Session:
+    """
+    Return the process-wide Session, so connections are kept alive across pages and messages.
+
+    The connection pool holds at least max_concurrency connections per host. A
+    message asking for more parallel pages than any before it gets a larger pool;
+    otherwise the extra connections would be opened and thrown away after each page
+    ("Connection pool is full").
+    """
+    global _session, _session_pool_size
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+        pool_size = max(max_concurrency, 10)
+        if pool_size > _session_pool_size:
+            # Requests in flight keep their connections from the old adapter
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+            _session_pool_size = pool_size
+        _session.headers.update(headers)
+        _session.auth = auth
+        return _session
+
+def request_with_retry(session: requests.Session, url: str, params: Optional[Dict[str, Any]] = None,
+                       max_retries: int = MAX_RETRIES, stream: bool = False) -> requests.Response:
+    """
+    GET with exponential backoff on connection errors, 429 and 5xx.
+
+    A Retry-After header (seconds or HTTP date) overrides the computed delay.
+    With stream=True the body is left unread for the caller.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            response = session.get(url, params=params, timeout=REQUEST_TIMEOUT, stream=stream)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == max_retries:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(f"Request to {url} failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+            response.raise_for_status()
+            return response
+
+        response.close()
+        delay = retry_after_seconds(response.headers.get("Retry-After"))
+        if delay is None:
+            delay = backoff_delay(attempt)
+        logger.warning(f"{url} returned {response.status_code}, retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter, capped at MAX_BACKOFF_SECONDS."""
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, BACKOFF_SECONDS * 2 ** attempt))
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return min(MAX_BACKOFF_SECONDS, max(0.0, float(value)))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+        return min(MAX_BACKOFF_SECONDS, max(0.0, (when - datetime.now(timezone.utc)).total_seconds()))
+    except (TypeError, ValueError):
+        return None
+
+def records_from_payload(payload: Any) -> List[Dict[str, Any]]:
+    """Records from a response body: its "data" array, a top-level array, or the object itself."""
+    if isinstance(payload, dict) and "data" in payload:
+        return payload["data"]
+    if isinstance(payload, list):
+        return payload
+    return [payload]
+
+def fetch_offset_pages(session: requests.Session, endpoint: str, params: Dict[str, Any],
+                       page_size: int = PAGE_SIZE, max_concurrency: int = MAX_CONCURRENCY) -> List[Tuple[list, int]]:
+    """
+    Fetch offset/limit pages, up to max_concurrency at a time.
+
+    The total isn't known up front, so pages are requested ahead in a window and
+    the first short page ends the table; pages past it are dropped. Raises if
+    MAX_PAGES full pages arrive without reaching the end.
+
+    Returns:
+        List of (records, response bytes) in offset order
+    """
+    def fetch(offset: int) -> Tuple[list, int]:
+        page_params = {**params, OFFSET_PARAM: offset, LIMIT_PARAM: page_size}
+        response = request_with_retry(session, endpoint, page_params)
+        return records_from_payload(response.json()), len(response.content)
+
+    pages = []
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="api-page") as executor:
+        pending = deque()
+        next_page = 0
+        while True:
+            while len(pending) < max_concurrency and next_page < MAX_PAGES:
+                pending.append(executor.submit(fetch, next_page * page_size))
+                next_page += 1
+            if not pending:
+                raise page_limit_error(endpoint)
+            records, size = pending.popleft().result()
+            pages.append((records, size))
+            if len(records) < page_size:
+                for future in pending:
+                    future.cancel()
+                break
+    return pages
+
+def fetch_cursor_pages(session: requests.Session, endpoint: str, params: Dict[str, Any],
+                       page_size: int = PAGE_SIZE) -> List[Tuple[list, int]]:
+    """Follow the next-page token found at CURSOR_FIELD (dotted path) in each body."""
+    return list(iter_cursor_pages(session, endpoint, params, page_size))
+
+def iter_cursor_pages(session: requests.Session, endpoint: str, params: Dict[str, Any],
+                      page_size: int = PAGE_SIZE) -> Iterator[Tuple[list, int]]:
+    """Yield (records, response bytes) per cursor page, requesting the next page only when asked."""
+    cursor = None
+    for _ in range(MAX_PAGES):
+        page_params = {**params, LIMIT_PARAM: page_size}
+        if cursor:
+            page_params[CURSOR_PARAM] = cursor
+        response = request_with_retry(session, endpoint, page_params)
+        payload = response.json()
+
+        cursor = payload
+        for key in CURSOR_FIELD.split("."):
+            cursor = cursor.get(key) if isinstance(cursor, dict) else None
+        yield records_from_payload(payload), len(response.content)
+        if not cursor:
+            return
+    raise page_limit_error(endpoint)
+
+def fetch_link_pages(session: requests.Session, endpoint: str, params: Dict[str, Any],
+                     page_size: int = PAGE_SIZE) -> List[Tuple[list, int]]:
+    """Follow rel="next" in the Link header; the next URL already carries its query string."""
+    pages = []
+    url, page_params = endpoint, {**params, LIMIT_PARAM: page_size}
+    while url:
+        if len(pages) >= MAX_PAGES:
+            raise page_limit_error(endpoint)
+        response = request_with_retry(session, url, page_params)
+        pages.append((records_from_payload(response.json()), len(response.content)))
+        url, page_params = response.links.get("next", {}).get("url"), None
+    return pages
+
+def page_limit_error(endpoint: str) -> RuntimeError:
+    """
+    Error for an endpoint with more than MAX_PAGES pages.
+
+    Loading the pages read so far would silently replace the table with part of
+    it, so the extraction fails instead.
+    """
+    message = f"{endpoint} has more than {MAX_PAGES} pages; raise source_API_MAX_PAGES or narrow the request"
+    logger.error(message)
+    return RuntimeError(message)
+
+def stream_batches(session: requests.Session, endpoint: str, params: Dict[str, Any], pagination: str,
+                   page_size: int = PAGE_SIZE, batch_rows: int = BATCH_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Yield DataFrames of at most batch_rows records across all pages.
+
+    Only the current batch of records and the decoder's read buffer are held in
+    memory. Pages are fetched one after another in this mode.
+    """
+    batch = []
+    rows = 0
+    for record in iter_records(session, endpoint, params, pagination, page_size):
+        batch.append(record)
+        if len(batch) >= batch_rows:
+            rows += len(batch)
+            yield pd.DataFrame.from_records(batch)
+            batch = []
+    if batch:
+        rows += len(batch)
+        yield pd.DataFrame.from_records(batch)
+    logger.info(f"Streamed {rows} rows from {endpoint} in batches of {batch_rows}")
+
+def iter_records(session: requests.Session, endpoint: str, params: Dict[str, Any], pagination: str,
+                 page_size: int = PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield records one at a time from every page of the endpoint."""
+    if pagination == "none":
+        yield from stream_records(request_with_retry(session, endpoint, params, stream=True))
+
+    elif pagination == "offset":
+        for page in range(MAX_PAGES):
+            page_params = {**params, OFFSET_PARAM: page * page_size, LIMIT_PARAM: page_size}
+            count = 0
+            for record in stream_records(request_with_retry(session, endpoint, page_params, stream=True)):
+                count += 1
+                yield record
+            if count < page_size:
+                break
+        else:
+            raise page_limit_error(endpoint)
+
+    elif pagination == "link":
+        url, page_params = endpoint, {**params, LIMIT_PARAM: page_size}
+        for _ in range(MAX_PAGES):
+            response = request_with_retry(session, url, page_params, stream=True)
+            next_url = response.links.get("next", {}).get("url")
+            yield from stream_records(response)
+            if not next_url:
+                break
+            url, page_params = next_url, None
+        else:
+            raise page_limit_error(endpoint)
+
+    elif pagination == "cursor":
+        # the next cursor is in the body, so each (page_size bounded) page is decoded whole,
+        # but only one page is held at a time
+        for records, _ in iter_cursor_pages(session, endpoint, params, page_size):
+            yield from records
+
+    else:
+        raise ValueError(f"Unknown pagination style: {pagination}")
+
+def stream_records(response: requests.Response) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records of one response as its body is read.
+
+    The body is parsed incrementally with ijson from its "data" array or a
+    top-level array.
+    """
+    try:
+        response.raw.decode_content = True  # undo gzip/deflate transparently
+        head = response.raw.read(STREAM_PEEK_BYTES)
+        prefix = "item" if head.lstrip().startswith(b"[") else "data.item"
+        yield from ijson.items(PrefixedReader(head, response.raw), prefix, use_float=True)
+    finally:
+        response.close()
+
+class PrefixedReader:
+    """File-like reader that replays bytes already read from the start of a stream."""
+
+    def __init__(self, head: bytes, raw):
+        self.head = head
+        self.raw = raw
+
+    def read(self, size: int = -1) -> bytes:
+        if self.head:
+            if size < 0 or size >= len(self.head):
+                data, self.head = self.head, b""
+            else:
+                data, self.head = self.head[:size], self.head[size:]
+            return data
+        return self.raw.read() if size < 0 else self.raw.read(size)
@@ -4,14 +4,46 @@
 # # ==============================================================================
 
 import os
+import math
 import logging
+import itertools
+import threading
 import pandas as pd
-from typing import Dict, Any
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from decimal import Decimal
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+from datetime import date, datetime, timedelta
 from logging_utils import get_logger
+from ge_runner import load_expectations_config
 
 logger = get_logger(__name__)
 
+# Connection pool settings shared by every message handled in this process
+POOL_SIZE = int(os.getenv("source_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("source_MAX_OVERFLOW", "5"))
+POOL_TIMEOUT = int(os.getenv("source_POOL_TIMEOUT", "30"))
+POOL_WARMUP = int(os.getenv("source_POOL_WARMUP", "0"))  # connections opened at service start
+
+# Streaming mode: yield DataFrames of CHUNK_ROWS rows instead of one DataFrame for the table
+STREAM_EXTRACTION = os.getenv("source_STREAM", "false")
+CHUNK_ROWS = int(os.getenv("source_CHUNK_ROWS", "50000"))
+
+# Key-range parallel mode (message param split_column): slices fetched at once
+PARALLELISM = int(os.getenv("source_PARALLELISM", "4"))
+
+# "parameterized" (projected columns, bound values) or "legacy" (SELECT * with literals)
+QUERY_BUILDER = os.getenv("source_QUERY_BUILDER", "parameterized")
+
+# This container only handles one source; its expectations config names the columns to select
+DATA_SOURCE = "source"
+
+# The query builders apply last_modified_since, so the handler may run incremental loads
+SUPPORTS_INCREMENTAL = True
+
+# Engines keyed by connection URL and pool settings; each one owns a live pool
+_engines = {}
+_engines_lock = threading.Lock()
+
 def extract_data(data_source: str, table_name: str, environment: str, **kwargs) -> Dict[str, Any]:
     """
     Extract data from source SQL Server database.
@@ -38,62 +70,200 @@ def extract_data(data_source: str, table_name: str, environment: str, **kwargs)
         logger.error(f"source extraction failed: {e}")
         return {"success": False, "error": str(e)}
     
+def get_connection_settings() -> Dict[str, Any]:
+    """
+    Read source connection settings from environment variables.
+
+    source_DB_URL, when set, replaces the SQL Server settings with any
+    SQLAlchemy URL (e.g. a local Postgres or SQLite database for testing).
+
+    Returns:
+        Dictionary with the connection URL and the server/port/database it points at
+    """
+    import urllib.parse
+
+    db_url = os.getenv("source_DB_URL")
+    if db_url:
+        return {"url": db_url, "server": None, "port": None, "database": None}
+
+    # Get SQL Server configuration from environment variables
+    server = os.getenv("source_SERVER") # SQL Server hostname/IP
+    port = os.getenv("source_PORT", "1433")
+    database = os.getenv("source_DATABASE")
+    username = os.getenv("source_USERNAME")
+    password = os.getenv("source_PASSWORD")
+    driver = os.getenv("source_DRIVER", "ODBC Driver 17 for SQL Server")
+
+    # Validate required credentials
+    if not all([server, database, username, password]):
+        missing = [var for var, val in {
+            "source_SERVER": server,
+            "source_DATABASE": database,
+            "source_USERNAME": username,
+            "source_PASSWORD": password
+        }.items() if not val]
+        raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
+
+    # URL encode password to handle special characters
+    encoded_password = urllib.parse.quote_plus(password)
+    encoded_username = urllib.parse.quote_plus(username)
+
+    # Build SQL Server connection string
+    connection_string = (
+        f"mssql+pyodbc://{encoded_username}:{encoded_password}@"
+        f"{server}:{port}/{database}?driver={urllib.parse.quote_plus(driver)}"
+        f"&TrustServerCertificate=yes" # Handle SSL certificate issues
+    )
+    return {"url": connection_string, "server": server, "port": port, "database": database}
+
+def get_engine(url: Optional[str] = None, pool_size: int = POOL_SIZE, max_overflow: int = MAX_OVERFLOW):
+    """
+    Return the cached engine for a connection URL, creating it on first use.
+
+    Consecutive messages reuse the engine's pool instead of opening a new
+    ODBC connection each time.
+
+    Args:
+        url: SQLAlchemy URL; defaults to the one from get_connection_settings()
+        pool_size: Connections kept open in the pool
+        max_overflow: Extra connections allowed under load
+
+    Returns:
+        sqlalchemy Engine
+    """
+    import sqlalchemy
+
+    url = url or get_connection_settings()["url"]
+    key = (url, pool_size, max_overflow)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            options = {
+                "pool_pre_ping": True, # Verify connections before use
+                "pool_recycle": 3600, # Recycle connections every hour
+            }
+            if url.startswith("mssql"):
+                options["connect_args"] = {
+                    "timeout": 30, # Connection timeout
+                    "autocommit": True
+                }
+            if not url.startswith("sqlite"):
+                options.update(pool_size=pool_size, max_overflow=max_overflow, pool_timeout=POOL_TIMEOUT)
+            engine = sqlalchemy.create_engine(url, **options)
+            _engines[key] = engine
+            logger.info(f"Created source engine for {engine.url.render_as_string(hide_password=True)}")
+        return engine
+
+def warm_up_engine(connections: int = POOL_WARMUP) -> Dict[str, Any]:
+    """
+    Open connections ahead of the first message so it doesn't pay the connect time.
+
+    Args:
+        connections: Number of connections to open and return to the pool
+
+    Returns:
+        Dictionary with success status and the number of connections opened
+    """
+    try:
+        engine = get_engine()
+        opened = []
+        try:
+            for _ in range(connections):
+                opened.append(engine.connect())
+        finally:
+            for connection in opened:
+                connection.close()
+        logger.info(f"Warmed up {len(opened)} source connections")
+        return {"success": True, "connections": len(opened)}
+    except Exception as e:
+        logger.error(f"source engine warm-up failed: {e}")
+        return {"success": False, "error": str(e)}
+
+def dispose_engines():
+    """Close every pooled connection, e.g. on shutdown or after a fork."""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
 def extract_source_data(table_name: str, environment: str, **kwargs) -> Dict[str, Any]:
     """Extract data from source SQL Server database."""
     try:
         import sqlalchemy
-        import urllib.parse
-
-        # Get SQL Server configuration from environment variables
-        server = os.getenv("source_SERVER") # SQL Server hostname/IP
-        port = os.getenv("source_PORT", "1433")
-        database = os.getenv("source_DATABASE")
-        username = os.getenv("source_USERNAME")
-        password = os.getenv("source_PASSWORD")
-        driver = os.getenv("source_DRIVER", "ODBC Driver 17 for SQL Server")
-
-        # Validate required credentials
-        if not all([server, database, username, password]):
-            missing = [var for var, val in {
-                "source_SERVER": server,
-                "source_DATABASE": database,
-                "source_USERNAME": username,
-                "source_PASSWORD": password
-            }.items() if not val]
-            raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
-
-        # URL encode password to handle special characters
-        encoded_password = urllib.parse.quote_plus(password)
-        encoded_username = urllib.parse.quote_plus(username)
-
-        # Build SQL Server connection string
-        connection_string = (
-            f"mssql+pyodbc://{encoded_username}:{encoded_password}@"
-            f"{server}:{port}/{database}?driver={urllib.parse.quote_plus(driver)}"
-            f"&TrustServerCertificate=yes" # Handle SSL certificate issues
-        )
-
-        logger.info(f"Connecting to source SQL Server: {server}:{port}/{database}")
-        
-        # Create engine with connection pooling and timeout settings
-        engine = sqlalchemy.create_engine(
-            connection_string,
-            pool_pre_ping=True, # Verify connections before use
-            pool_recycle=3600, # Recycle connections every hour
-            connect_args={
-                "timeout": 30, # Connection timeout
-                "autocommit": True
-            }
-        )
 
-        # Build SQL query
-        query = build_source_query(table_name, **kwargs)
+        settings = get_connection_settings()
+        engine = get_engine(settings["url"])
+        connection_info = engine.url.render_as_string(hide_password=True)
 
-        logger.info(f"Executing source query: {query}")
+        logger.info(f"Connecting to source database: {connection_info}")
+
+        # Build SQL query: projected columns and bound parameters unless the legacy builder is selected
+        columns = kwargs.get("columns") or default_columns(table_name)
+        if isinstance(columns, str):
+            columns = [column.strip() for column in columns.split(",") if column.strip()]
+        if columns and kwargs.get("watermark_column") and kwargs["watermark_column"] not in columns:
+            columns = columns + [kwargs["watermark_column"]]
+        if QUERY_BUILDER == "legacy":
+            query, params = build_source_query(table_name, **kwargs), {}
+        else:
+            query, params = build_parameterized_query(table_name, columns, engine.dialect, **kwargs)
+
+        logger.info(f"Executing source query: {query} with {params}")
+
+        source_metadata = {
+            "server": settings["server"],
+            "database": settings["database"],
+            "table": table_name,
+            "query": query,
+            "columns": columns,
+            "connection_info": connection_info
+        }
+
+        split_column = kwargs.get("split_column")
+        if split_column and "limit" not in kwargs:
+            # Key-range slices on parallel connections; the pool caps how many run at once
+            parallelism = max(1, min(int(kwargs.get("parallelism", PARALLELISM)), POOL_SIZE + MAX_OVERFLOW))
+            slices = int(kwargs.get("split_slices", parallelism))
+            conditions, filter_params = build_bound_conditions(**kwargs)
+            slice_stream = fetch_key_slices(engine, table_name, split_column, conditions, filter_params,
+                                            columns, parallelism, slices)
+            source_metadata.update(split_column=split_column, parallelism=parallelism)
+
+            if is_enabled(kwargs.get("stream", STREAM_EXTRACTION)):
+                return {
+                    "success": True,
+                    "streaming": True,
+                    "batches": (df for _, df in slice_stream),
+                    "extraction_timestamp": datetime.utcnow(),
+                    "source_metadata": source_metadata
+                }
+
+            parts = dict(slice_stream)
+            df = pd.concat([parts[index] for index in sorted(parts)], ignore_index=True)
+            logger.info(f"Successfully extracted {len(df)} rows from source table: {table_name} in {len(parts)} slices")
+            return {
+                "success": True,
+                "data": df,
+                "rows_extracted": len(df),
+                "extraction_timestamp": datetime.utcnow(),
+                "source_metadata": source_metadata
+            }
+
+        if is_enabled(kwargs.get("stream", STREAM_EXTRACTION)):
+            # Nothing is read until the caller iterates the batches
+            chunk_rows = int(kwargs.get("chunk_rows", CHUNK_ROWS))
+            return {
+                "success": True,
+                "streaming": True,
+                "batches": stream_source_batches(engine, query, chunk_rows, params=params),
+                "chunk_rows": chunk_rows,
+                "extraction_timestamp": datetime.utcnow(),
+                "source_metadata": source_metadata
+            }
 
         # Execute query and load into DataFrame
         with engine.connect() as connection:
-            df = pd.read_sql(query, connection)
+            df = pd.read_sql(to_statement(query, params), connection, params=params)
 
         # Log success
         logger.info(f"Successfully extracted {len(df)} rows from source table: {table_name}")
@@ -103,13 +273,7 @@ def extract_source_data(table_name: str, environment: str, **kwargs) -> Dict[str
             "data": df,
             "rows_extracted": len(df),
             "extraction_timestamp": datetime.utcnow(),
-            "source_metadata": {
-                "server": server,
-                "database": database,
-                "table": table_name,
-                "query": query,
-                "connection_info": f"{server}:{port}/{database}"
-            }
+            "source_metadata": source_metadata
         }
 
     except sqlalchemy.exc.SQLAlchemyError as e:
@@ -119,6 +283,38 @@ def extract_source_data(table_name: str, environment: str, **kwargs) -> Dict[str
         logger.error(f"source extraction failed: {e}")
         return {"success": False, "error": str(e)}
 
+def stream_source_batches(engine, query: str, chunk_rows: int = CHUNK_ROWS, as_arrow: bool = False,
+                          params: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """
+    Yield query results in chunks over a server-side cursor.
+
+    The connection stays checked out until the generator is exhausted or closed.
+
+    Args:
+        engine: sqlalchemy Engine from get_engine()
+        query: SQL query to run
+        chunk_rows: Rows per chunk
+        as_arrow: Yield pyarrow Tables instead of DataFrames
+        params: Bound parameter values for the query
+
+    Yields:
+        DataFrame (or pyarrow Table) per chunk
+    """
+    if as_arrow:
+        import pyarrow as pa
+
+    rows = 0
+    with engine.connect().execution_options(stream_results=True, max_row_buffer=chunk_rows) as connection:
+        params = params or {}
+        for chunk in pd.read_sql(to_statement(query, params), connection, params=params, chunksize=chunk_rows):
+            rows += len(chunk)
+            yield pa.Table.from_pandas(chunk, preserve_index=False) if as_arrow else chunk
+    logger.info(f"Streamed {rows} rows in chunks of {chunk_rows}")
+
+def is_enabled(value: Any) -> bool:
+    """Interpret a flag from a message attribute or env var ("true", "1", True)."""
+    return str(value).lower() in ("true", "1", "yes")
+
 def build_source_query(table_name: str, **kwargs) -> str:
     """
     Build SQL query for source table extraction.
@@ -134,6 +330,24 @@ def build_source_query(table_name: str, **kwargs) -> str:
     query = f"SELECT * FROM {table_name}"
 
     # Add WHERE conditions based on parameters
+    conditions = build_source_conditions(**kwargs)
+
+    # Add WHERE clause if conditions exist
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    # Add ORDER BY for consistent results (no default: the columns aren't known here)
+    if "order_by" in kwargs:
+        query += f" ORDER BY {kwargs['order_by']}"
+
+    # Add LIMIT if specified
+    if "limit" in kwargs:
+        query = f"SELECT TOP {kwargs['limit']} * FROM ({query}) AS limited_query"
+
+    return query
+
+def build_source_conditions(**kwargs) -> List[str]:
+    """WHERE conditions for the filter parameters in a message."""
     conditions = []
 
     # Date range filtering
@@ -147,6 +361,10 @@ def build_source_query(table_name: str, **kwargs) -> str:
     if "last_modified_after" in kwargs:
         conditions.append(f"last_modified > '{kwargs['last_modified_after']}'")
 
+    # Inclusive form used by incremental loads, which merge the re-read boundary rows
+    if "last_modified_since" in kwargs:
+        conditions.append(f"last_modified >= '{kwargs['last_modified_since']}'")
+
     # Filter by specific IDs if provided
     if "filter_ids" in kwargs and kwargs["filter_ids"]:
         id_list = ", ".join(str(id) for id in kwargs["filter_ids"])
@@ -156,22 +374,207 @@ def build_source_query(table_name: str, **kwargs) -> str:
     if "custom_where" in kwargs:
         conditions.append(kwargs["custom_where"])
 
-    # Add WHERE clause if conditions exist
+    return conditions
+
+def build_parameterized_query(table_name: str, columns: Optional[List[str]] = None, dialect=None,
+                              **kwargs) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build a column-projected query with bound parameters instead of literals.
+
+    Every distinct date or ID list reuses one cached plan on the server, and only
+    the listed columns are transferred.
+
+    Args:
+        table_name: Name of the source table
+        columns: Columns to select; None selects *
+        dialect: SQLAlchemy dialect used to quote identifiers and pick TOP or LIMIT
+        **kwargs: Filter parameters (start_date, end_date, last_modified_after,
+            last_modified_since, filter_ids, custom_where, order_by, limit)
+
+    Returns:
+        (SQL with :named parameters, parameter values)
+    """
+    quote = dialect.identifier_preparer.quote if dialect is not None else (lambda name: name)
+    select_list = ", ".join(quote(column) for column in columns) if columns else "*"
+    conditions, params = build_bound_conditions(**kwargs)
+
+    mssql = dialect is None or dialect.name == "mssql"
+    top = ""
+    if "limit" in kwargs and mssql:
+        top = "TOP (:limit) "
+        params["limit"] = int(kwargs["limit"])
+
+    query = f"SELECT {top}{select_list} FROM {table_name}"
     if conditions:
         query += " WHERE " + " AND ".join(conditions)
 
-    # Add ORDER BY for consistent results
-    if "order_by" in kwargs:
-        query += f" ORDER BY {kwargs['order_by']}"
+    # Default ordering by id, else created_date, when the projection includes it
+    order_by = kwargs.get("order_by")
+    if not order_by and columns:
+        order_by = next((quote(column) for column in ("id", "created_date") if column in columns), None)
+    if order_by:
+        query += f" ORDER BY {order_by}"
+
+    if "limit" in kwargs and not mssql:
+        query += " LIMIT :limit"
+        params["limit"] = int(kwargs["limit"])
+
+    return query, params
+
+def build_bound_conditions(**kwargs) -> Tuple[List[str], Dict[str, Any]]:
+    """WHERE conditions for the message's filter parameters, with values as bound parameters."""
+    conditions, params = [], {}
+
+    # Date range filtering
+    if "start_date" in kwargs:
+        conditions.append("created_date >= :start_date")
+        params["start_date"] = kwargs["start_date"]
+
+    if "end_date" in kwargs:
+        conditions.append("created_date <= :end_date")
+        params["end_date"] = kwargs["end_date"]
+
+    # Incremental loading based on last modified
+    if "last_modified_after" in kwargs:
+        conditions.append("last_modified > :last_modified_after")
+        params["last_modified_after"] = kwargs["last_modified_after"]
+
+    # Inclusive form used by incremental loads, which merge the re-read boundary rows
+    if "last_modified_since" in kwargs:
+        conditions.append("last_modified >= :last_modified_since")
+        params["last_modified_since"] = kwargs["last_modified_since"]
+
+    # Filter by specific IDs; expanded to one placeholder per ID
+    filter_ids = kwargs.get("filter_ids")
+    if isinstance(filter_ids, str):
+        filter_ids = [value.strip() for value in filter_ids.split(",") if value.strip()]
+    if filter_ids:
+        conditions.append("id IN :filter_ids")
+        params["filter_ids"] = list(filter_ids)
+
+    # Custom WHERE clause (trusted, passed through as SQL)
+    if "custom_where" in kwargs:
+        conditions.append(kwargs["custom_where"])
+
+    return conditions, params
+
+def to_statement(query: str, params: Dict[str, Any]):
+    """sqlalchemy text() for the query, with list-valued parameters marked expanding."""
+    import sqlalchemy
+
+    statement = sqlalchemy.text(query)
+    expanding = [sqlalchemy.bindparam(name, expanding=True) for name, value in params.items()
+                 if isinstance(value, (list, tuple))]
+    return statement.bindparams(*expanding) if expanding else statement
+
+def default_columns(table_name: str) -> Optional[List[str]]:
+    """Columns named in the table's expectations config, or None to select *."""
+    config = load_expectations_config(DATA_SOURCE, table_name)
+    columns = config.get("expect_columns_to_match_set", {}).get("column_set")
+    return list(columns) if columns else None
+
+def get_key_range(engine, table_name: str, split_column: str, conditions: List[str],
+                  params: Dict[str, Any]) -> Tuple[Any, Any]:
+    """MIN and MAX of the split column over the filtered rows."""
+    key = engine.dialect.identifier_preparer.quote(split_column)
+    query = f"SELECT MIN({key}), MAX({key}) FROM {table_name}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    with engine.connect() as connection:
+        low, high = connection.execute(to_statement(query, params), params).fetchone()
+    return low, high
+
+def split_key_range(low: Any, high: Any, slices: int) -> List[Tuple[Any, Any, bool]]:
+    """
+    Split [low, high] into at most `slices` contiguous ranges.
+
+    Integers and dates step by whole units so no slice is empty by construction.
+
+    Returns:
+        List of (lower, upper, last) tuples; lower is inclusive, upper is
+        exclusive except on the last slice
+    """
+    if low is None:
+        return []
+    if isinstance(low, datetime):
+        step = (high - low) / slices
+    elif isinstance(low, date):
+        step = timedelta(days=max(1, math.ceil(((high - low).days + 1) / slices)))
+    elif isinstance(low, int):
+        step = max(1, math.ceil((high - low + 1) / slices))
+    elif isinstance(low, (float, Decimal)):
+        step = (high - low) / slices
     else:
-        # Default ordering by ID or created_date if available
-        query += " ORDER BY CASE WHEN COLUMPROPERTY(OBJECT_ID(?), 'id', 'ColumnId') IS NOT NULL THEN id ELSE crea"  # TODO check the actual code
+        raise ValueError(f"split_column must be numeric or date/datetime, got {type(low).__name__}")
+
+    bounds = []
+    lower = low
+    for index in range(slices):
+        upper = lower + step
+        last = index == slices - 1 or upper >= high
+        if last:
+            upper = high
+        bounds.append((lower, upper, last))
+        if last:
+            break
+        lower = upper
+    return bounds
+
+def build_slice_query(table_name: str, key: str, conditions: List[str], select_list: str = "*",
+                      last: bool = False, nulls: bool = False) -> str:
+    """
+    Query for one key range (bound as :lower and :upper), or for rows with a NULL key.
 
-    # Add LIMIT if specified
-    if "limit" in kwargs:
-        query = f"SELECT TOP {kwargs['limit']} * FROM ({query}) AS limited_query"
+    key is the split column already quoted by the dialect's identifier_preparer.
+    """
+    if nulls:
+        predicate = f"{key} IS NULL"
+    else:
+        predicate = f"{key} >= :lower AND {key} {'<=' if last else '<'} :upper"
+    return f"SELECT {select_list} FROM {table_name} WHERE {' AND '.join(conditions + [predicate])} ORDER BY {key}"
 
-    return query
+def fetch_key_slices(engine, table_name: str, split_column: str, conditions: List[str], params: Dict[str, Any],
+                     columns: Optional[List[str]] = None, parallelism: int = PARALLELISM,
+                     slices: Optional[int] = None) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """
+    Fetch the table in key-range slices on up to `parallelism` pooled connections.
+
+    At most `parallelism` slices are in flight or waiting to be consumed, so a
+    slow consumer bounds memory to that many slices.
+
+    Yields:
+        (slice index, DataFrame) in completion order; sort by index to restore key order
+    """
+    low, high = get_key_range(engine, table_name, split_column, conditions, params)
+    # split_column comes from the message, so it is quoted like the selected columns
+    preparer = engine.dialect.identifier_preparer
+    key = preparer.quote(split_column)
+    select_list = ", ".join(preparer.quote(column) for column in columns) if columns else "*"
+    tasks = [
+        (build_slice_query(table_name, key, conditions, select_list, last),
+         {**params, "lower": lower, "upper": upper})
+        for lower, upper, last in split_key_range(low, high, slices or parallelism)
+    ]
+    tasks.append((build_slice_query(table_name, key, conditions, select_list, nulls=True), params))
+    logger.info(f"Fetching {table_name} in {len(tasks)} slices of {split_column} [{low}, {high}], {parallelism} at a time")
+
+    def fetch(query: str, params: Dict[str, Any]) -> pd.DataFrame:
+        with engine.connect() as connection:
+            return pd.read_sql(to_statement(query, params), connection, params=params)
+
+    waiting = iter(enumerate(tasks))
+    with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="slice") as executor:
+        pending = {
+            executor.submit(fetch, query, params): index
+            for index, (query, params) in itertools.islice(waiting, parallelism)
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                for next_index, (query, params) in itertools.islice(waiting, 1):
+                    pending[executor.submit(fetch, query, params)] = next_index
+                yield index, future.result()
 
 def test_source_connection() -> Dict[str, Any]:
     """
@@ -182,46 +585,31 @@ def test_source_connection() -> Dict[str, Any]:
     """
     try:
         import sqlalchemy
-        import urllib.parse
 
         # Get connection details
-        server = os.getenv("source_SERVER")
-        port = os.getenv("source_PORT", "1433")
-        database = os.getenv("source_DATABASE")
-        username = os.getenv("source_USERNAME")
-        password = os.getenv("source_PASSWORD")
-
-        if not all([server, database, username, password]):
+        try:
+            settings = get_connection_settings()
+        except ValueError:
             return {"success": False, "error": "Missing connection credentials"}
 
-        # Build connection string
-        encoded_password = urllib.parse.quote_plus(password)
-        encoded_username = urllib.parse.quote_plus(username)
-
-        connection_string = (
-            f"mssql+pyodbc://{encoded_username}:{encoded_password}@"
-            f"{server}:{port}/{database}?driver=ODBC+Driver17+for+SQL+Server"
-            f"&TrustServerCertificate=yes"
-        )
+        # Test connection on a pooled connection
+        engine = get_engine(settings["url"])
 
-    # Test connection
-    engine = sqlalchemy.create_engine(connection_string)
-
-    with engine.connect() as connection:
-        result = connection.execute(sqlalchemy.text("SELECT 1 AS test_connection"))
-        test_value = result.fetchone()[0]
+        with engine.connect() as connection:
+            result = connection.execute(sqlalchemy.text("SELECT 1 AS test_connection"))
+            test_value = result.fetchone()[0]
 
         if test_value == 1:
-            logger.info(f"source connection test successful: {server}:{port}/{database}")
+            logger.info(f"source connection test successful: {engine.url.render_as_string(hide_password=True)}")
             return {
                 "success": True,
                 "message": "Connection successful",
-                "server": f"{server}:{port}",
-                "database": database
+                "server": f"{settings['server']}:{settings['port']}" if settings["server"] else None,
+                "database": settings["database"] or engine.url.database
             }
         else:
             return {"success": False, "error": "Connection test failed"}
 
     except Exception as e:
         logger.error(f"source connection test failed: {e}")
-        return {"success": False, "error": str(e)}
\ No newline at end of file
+        return {"success": False, "error": str(e)}
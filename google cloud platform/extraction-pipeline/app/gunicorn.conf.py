@@ -0,0 +1,23 @@
+# ==============================================================================
+# gunicorn.conf.py
+# Production server settings for the Cloud Run service.
+#   gunicorn --config gunicorn.conf.py main:app
+# ==============================================================================
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+
+# Threads let one process handle several pushes at once (the pipeline is mostly I/O).
+# With ASYNC_ACK=true keep a single worker process: job status lives in the process
+# that accepted the job, so /jobs/<id> is only reliable with one process.
+workers = int(os.getenv("GUNICORN_WORKERS", "1"))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+worker_class = "gthread"
+
+# 0 disables the worker timeout; Cloud Run enforces its own request timeout
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "0"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
@@ -0,0 +1,123 @@
+# ==============================================================================
+# job_queue.py
+# Bounded in-process worker pool for pipelines accepted with an early ack.
+# ==============================================================================
+
+import os
+import queue
+import threading
+import uuid
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "16"))
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "500"))
+
+
+class QueueFull(Exception):
+    """Raised when every worker is busy and the backlog is at its limit."""
+
+
+class JobQueue:
+    """
+    Fixed number of worker threads reading from a bounded queue.
+
+    Job status is kept in memory for the last `history` jobs, so it is only
+    visible from the process that accepted the job.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, queue_size: int = JOB_QUEUE_SIZE, history: int = JOB_HISTORY):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.history = history
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.threads = [
+            threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, fn: Callable[..., Dict[str, Any]], *args, **kwargs) -> str:
+        """
+        Queue fn(*args, **kwargs) and return its job id.
+
+        Raises:
+            QueueFull: if the backlog is already at queue_size
+        """
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self.jobs[job_id] = {
+                "job_id": job_id,
+                "status": "queued",
+                "submitted_at": datetime.utcnow().isoformat(),
+            }
+            self._trim()
+        try:
+            self.queue.put_nowait((job_id, fn, args, kwargs))
+        except queue.Full:
+            with self.lock:
+                self.jobs.pop(job_id, None)
+            raise QueueFull(f"job queue is full ({self.queue.maxsize} waiting)")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the job's status record, or None if unknown or expired."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Counts of tracked jobs by status plus the current backlog."""
+        with self.lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"workers": len(self.threads), "queued": self.queue.qsize(),
+                "queue_size": self.queue.maxsize, "jobs": counts}
+
+    def _worker(self):
+        while True:
+            job_id, fn, args, kwargs = self.queue.get()
+            self._update(job_id, status="running", started_at=datetime.utcnow().isoformat())
+            try:
+                result = fn(*args, **kwargs)
+                status = "succeeded" if result.get("success") else "failed"
+                self._update(job_id, status=status, result=result)
+            except Exception as e:
+                logger.exception(f"Job {job_id} crashed: {e}")
+                self._update(job_id, status="failed", result={"success": False, "error": str(e)})
+            finally:
+                self._update(job_id, finished_at=datetime.utcnow().isoformat())
+                self.queue.task_done()
+
+    def _update(self, job_id: str, **fields):
+        with self.lock:
+            if job_id in self.jobs:
+                self.jobs[job_id].update(fields)
+
+    def _trim(self):
+        # drop the oldest finished jobs once history is exceeded
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.history:
+                break
+            if self.jobs[job_id]["status"] in ("succeeded", "failed"):
+                del self.jobs[job_id]
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide JobQueue, started on first use."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        return _job_queue
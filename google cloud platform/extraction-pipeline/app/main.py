@@ -9,14 +9,40 @@ from flask import Flask, request
 from google.cloud import error_reporting
 from pubsub_handler import handle_pubsub_message
 from logging_utils import setup_logging
+from job_queue import QueueFull, get_job_queue
+from dedup import get_dedup_cache, DONE, IN_FLIGHT
 
 app = Flask(__name__)
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Open pooled source connections before the first push arrives (database sources only)
+if int(os.getenv("source_POOL_WARMUP", "0")) > 0:
+    from extract_db import warm_up_engine
+    warm_up_engine()
+
 # Get data source name from environment
 DATA_SOURCE = os.getenv("DATA_SOURCE")
 
+# Ack the push as soon as the job is queued instead of when the pipeline finishes.
+# The message is not redelivered if the job later fails, so failures must be
+# picked up from /jobs/<id> or the logs. On Cloud Run this needs CPU always allocated.
+ASYNC_ACK = os.getenv("ASYNC_ACK", "false").lower() == "true"
+
+# Ack redeliveries of a messageId that already succeeded without redoing the work;
+# redeliveries of one still running get 409 so Pub/Sub retries them later
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+
+def process_message(pubsub_request, message_id=None):
+    """Run the pipeline for one push and record the outcome in the dedup cache."""
+    result = {"success": False}
+    try:
+        result = handle_pubsub_message(pubsub_request, DATA_SOURCE)
+        return result
+    finally:
+        if message_id:
+            get_dedup_cache().finish(message_id, result.get("success", False))
+
 @app.route("/", methods=["POST"])
 def pubsub_endpoint():
     """Handle Pub/Sub messages for this specific data source."""
@@ -26,8 +52,30 @@ def pubsub_endpoint():
             logger.error("No Pub/Sub message received")
             return "Bad Request: no Pub/Sub message received", 400
 
+        message_id = None
+        if DEDUP_ENABLED:
+            message_id = pubsub_request.get("message", {}).get("messageId")
+            state = get_dedup_cache().begin(message_id) if message_id else None
+            if state == DONE:
+                return f"Duplicate: message {message_id} already handled", 200
+            if state == IN_FLIGHT:
+                # not acked: if the running delivery fails, Pub/Sub redelivers this one later
+                return f"Conflict: message {message_id} is still being processed", 409
+
+        if ASYNC_ACK:
+            try:
+                job_id = get_job_queue().submit(process_message, pubsub_request, message_id)
+            except QueueFull as e:
+                # non-2xx makes Pub/Sub back off and redeliver later
+                if message_id:
+                    get_dedup_cache().finish(message_id, False)
+                logger.warning(f"Rejecting push: {e}")
+                return f"Busy: {e}", 429
+            logger.info(f"Queued job {job_id}")
+            return {"job_id": job_id, "status_url": f"/jobs/{job_id}"}, 202
+
         # Process the message for this data source
-        result = handle_pubsub_message(pubsub_request, DATA_SOURCE)
+        result = process_message(pubsub_request, message_id)
 
         if result.get("success"):
             logger.info(f"Pipeline completed successfully: {result}")
@@ -41,15 +89,29 @@ def pubsub_endpoint():
         error_reporting.Client().report_exception()
         return f"Internal error: {str(e)}", 500
 
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """Status of a job queued with ASYNC_ACK."""
+    job = get_job_queue().get(job_id)
+    if not job:
+        return {"error": f"Unknown job: {job_id}"}, 404
+    return job, 200
+
 @app.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint."""
-    return {
+    health = {
         "status": "healthy",
         "data_source": DATA_SOURCE,
         "service": "service_name"
-    }, 200
+    }
+    if ASYNC_ACK:
+        health["jobs"] = get_job_queue().stats()
+    if DEDUP_ENABLED:
+        health["dedup"] = get_dedup_cache().stats()
+    return health, 200
 
-    if __name__ == "__main__":
-        port = int(os.environ.get("PORT", 8080))
-        app.run(host="0.0.0.0", port=port)
\ No newline at end of file
+if __name__ == "__main__":
+    # Local development only; production runs gunicorn --config gunicorn.conf.py main:app
+    port = int(os.environ.get("PORT", 8080))
+    app.run(host="0.0.0.0", port=port, threaded=True)
@@ -3,27 +3,61 @@
 # Parses and processes Pub/Sub messages to trigger ingestion jobs.
 # ==============================================================================
 
+import os
 import base64
 import json
+import fnmatch
 import logging
-from typing import Dict, Any
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from typing import Dict, Any, List, Iterable, Iterator, Optional
 from datetime import datetime
-from template_source.app.extract_api import extract_data
-from ge_runner import run_data_validation
-from bigquery_utils import load_to_bigquery, log_metadata
+from types import ModuleType
+from ge_runner import run_data_validation, list_configured_tables, load_expectations_config, StreamingValidation
+from bigquery_utils import load_to_bigquery, load_batches_to_bigquery, log_metadata
+from watermark_store import get_watermark_store, to_watermark, WATERMARK_COLUMN
 
 logger = logging.getLogger(__name__)
 
+MAX_PARALLEL_TABLES = int(os.getenv("MAX_PARALLEL_TABLES", "4"))
+
+# Extractor modules by name. SOURCE_EXTRACTOR picks the one this service uses; a
+# message's "extractor" key overrides it. Modules are imported on first use, so a
+# service only needs the client libraries of the extractors it runs.
+EXTRACTORS = {"api": "extract_api", "db": "extract_db"}
+SOURCE_EXTRACTOR = os.getenv("SOURCE_EXTRACTOR", "api")
+
+# Message keys used for routing; everything else is passed to extraction
+RESERVED_KEYS = {"table_name", "tables", "environment", "level", "max_parallel", "extractor"}
+
+# Unfiltered messages extract only rows modified since the stored watermark and merge
+# them into the table on its key (message key_columns, else the table's unique columns
+# in the expectations config). The boundary timestamp is re-read on purpose: rows that
+# share it with the last load but arrived later are not lost, and the merge absorbs the
+# repeats. Needs an extractor that applies last_modified_since (its SUPPORTS_INCREMENTAL,
+# e.g. SOURCE_EXTRACTOR=db) and a key; otherwise, or with any explicit filter or full_refresh=true, the table is
+# replaced by a full load.
+INCREMENTAL_LOADS = os.getenv("INCREMENTAL_LOADS", "false").lower() == "true"
+FILTER_KEYS = {"start_date", "end_date", "last_modified_after", "last_modified_since", "filter_ids", "custom_where"}
+
 def handle_pubsub_message(envelope: Dict[str, Any], data_source: str) -> Dict[str, Any]:
     """
     Handle incoming Pub/Sub message and orchestrate the pipeline.
 
+    The message names its tables with `table_name`, a `tables` list (or comma
+    separated string), or a glob such as "hr_*" matched against the tables in the
+    expectations config. Several tables run concurrently, at most `max_parallel`
+    (default MAX_PARALLEL_TABLES) at a time, sharing the BigQuery client and the
+    expectations config.
+
     Args:
         envelope: Pub/Sub message envelope
         data_source: Name of the data source (workday, ccure, etc.)
 
     Returns:
-        Dictionary with success status and details
+        Dictionary with success status and details; for several tables a
+        per-table summary under "tables"
     """
     try:
         # Decode message
@@ -31,20 +65,112 @@ def handle_pubsub_message(envelope: Dict[str, Any], data_source: str) -> Dict[st
         logger.info(f"Processing {data_source} pipeline: {message_data}")
 
         # Extract required parameters
-        table_name = message_data.get("table_name")
         environment = message_data.get("environment", "dev")
         pipeline_level = message_data.get("level", "bronze")
+        params = {k: v for k, v in message_data.items() if k not in RESERVED_KEYS}
+        extractor = message_data.get("extractor", SOURCE_EXTRACTOR)
+        tables = resolve_tables(message_data, data_source)
+
+        if len(tables) == 1:
+            return run_table_pipeline(data_source, tables[0], environment, pipeline_level, params, extractor)
+
+        parallelism = max(1, min(int(message_data.get("max_parallel", MAX_PARALLEL_TABLES)), len(tables)))
+        logger.info(f"Running {len(tables)} {data_source} tables, {parallelism} at a time")
+        with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="table") as executor:
+            futures = {
+                table: executor.submit(run_table_pipeline, data_source, table, environment, pipeline_level,
+                                       params, extractor)
+                for table in tables
+            }
+        results = {table: future.result() for table, future in futures.items()}
+
+        failed = sorted(table for table, result in results.items() if not result.get("success"))
+        summary = {
+            "success": not failed,
+            "message": f"Pipeline completed for {len(tables) - len(failed)}/{len(tables)} {data_source} tables",
+            "rows_processed": sum(result.get("rows_processed", 0) for result in results.values()),
+            "tables": results,
+        }
+        if failed:
+            summary["error"] = "; ".join(f"{table}: {results[table].get('error')}" for table in failed)
+        return summary
+
+    except Exception as e:
+        logger.exception(f"Pipeline failed for {data_source}: {e}")
+        return {"success": False, "error": str(e)}
 
-        if not table_name:
-            raise ValueError("table_name is required in Pub/Sub message")
+def resolve_tables(message_data: Dict[str, Any], data_source: str) -> List[str]:
+    """
+    Expand the message's table selection into a list of table names.
+
+    Entries containing glob characters are matched against the tables configured
+    in the expectations file; plain names are kept as given. Order is preserved
+    and duplicates dropped.
+    """
+    requested = message_data.get("tables") or message_data.get("table_name")
+    if not requested:
+        raise ValueError("table_name or tables is required in Pub/Sub message")
+    if isinstance(requested, str):
+        requested = [name.strip() for name in requested.split(",") if name.strip()]
+
+    tables = []
+    for name in requested:
+        if any(ch in name for ch in "*?["):
+            matches = fnmatch.filter(list_configured_tables(data_source), name)
+            if not matches:
+                logger.warning(f"Pattern {name!r} matched no configured {data_source} tables")
+            tables.extend(matches)
+        else:
+            tables.append(name)
+    tables = list(dict.fromkeys(tables))
+    if not tables:
+        raise ValueError(f"No tables matched {requested}")
+    return tables
+
+def get_extractor(name: str) -> ModuleType:
+    """Extractor module registered under name in EXTRACTORS."""
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown extractor {name!r}; expected one of {sorted(EXTRACTORS)}")
+    return importlib.import_module(EXTRACTORS[name])
+
+def run_table_pipeline(data_source: str, table_name: str, environment: str, pipeline_level: str,
+                       params: Dict[str, Any], extractor: str = SOURCE_EXTRACTOR) -> Dict[str, Any]:
+    """
+    Extract, validate, load and log metadata for one table.
+
+    Args:
+        data_source: Name of the data source
+        table_name: Table to process
+        environment: Environment (dev, staging, prod)
+        pipeline_level: Pipeline level (bronze, silver, etc.)
+        params: Remaining message parameters passed through to extraction
+        extractor: Name of the extractor in EXTRACTORS
+
+    Returns:
+        Dictionary with success status and details
+    """
+    try:
+        extractor = get_extractor(extractor)
+        merge_keys = incremental_keys(data_source, table_name, params,
+                                      getattr(extractor, "SUPPORTS_INCREMENTAL", False))
+        incremental = merge_keys is not None
+        watermark = None
+        if incremental:
+            # Make sure a column-projected extract still returns the watermark column
+            params = {**params, "watermark_column": WATERMARK_COLUMN}
+            watermark = get_watermark_store().get(data_source, table_name, environment)
+            if watermark:
+                logger.info(f"Incremental load of {data_source}.{table_name} since {WATERMARK_COLUMN} {watermark}, "
+                            f"merged on {merge_keys}")
+                params = {**params, "last_modified_since": to_watermark(watermark)}
 
         # Step 1: Extract data
         logger.info(f"Starting data extraction for {data_source}.{table_name}")
-        extraction_result = extract_data(
+        extraction_result = extractor.extract_data(
             data_source=data_source,
             table_name=table_name,
             environment=environment,
-            **message_data
+            **params
         )
 
         if not extraction_result.get("success"):
@@ -53,6 +179,18 @@ def handle_pubsub_message(envelope: Dict[str, Any], data_source: str) -> Dict[st
                 "error": f"Data extraction failed: {extraction_result.get('error')}"
             }
 
+        if extraction_result.get("streaming") or watermark:
+            # A delta is merged through the staged loader; a full streamed table is swapped in whole
+            batches = extraction_result["batches"] if extraction_result.get("streaming") else [extraction_result["data"]]
+            high_water = {}
+            result = run_streaming_pipeline(data_source, table_name, environment, pipeline_level,
+                                            track_column_max(batches, high_water),
+                                            merge_keys=merge_keys if watermark else None)
+            if result.get("success") and incremental:
+                result["watermark"] = advance_watermark(data_source, table_name, environment,
+                                                        watermark, high_water.get("max"))
+            return result
+
         data = extraction_result["data"]
         logger.info(f"Extracted {len(data)} rows")
 
@@ -83,6 +221,10 @@ def handle_pubsub_message(envelope: Dict[str, Any], data_source: str) -> Dict[st
                 "error": f"BigQuery load failed: {load_result.get('error')}"
             }
 
+        # The watermark only moves once the rows are safely in BigQuery
+        if incremental:
+            watermark = advance_watermark(data_source, table_name, environment, watermark, column_max(data))
+
         # Step 4: Log monitoring metadata
         logger.info(f"Logging metadata for {data_source}.{table_name}")
         log_metadata(
@@ -94,18 +236,148 @@ def handle_pubsub_message(envelope: Dict[str, Any], data_source: str) -> Dict[st
             load_results=load_result
         )
 
-        return {
+        result = {
             "success": True,
             "message": f"Pipeline completed for {data_source}.{table_name}",
             "rows_processed": len(data),
             "validation_passed": validation_result.get("success", False),
             "data_quality_score": validation_result.get("data_quality_score", 0)
         }
+        if incremental:
+            result["watermark"] = watermark
+        return result
         
     except Exception as e:
-        logger.exception(f"Pipeline failed for {data_source}: {e}")
+        logger.exception(f"Pipeline failed for {data_source}.{table_name}: {e}")
         return {"success": False, "error": str(e)}
 
+def run_streaming_pipeline(data_source: str, table_name: str, environment: str, pipeline_level: str,
+                           batches: Iterable[pd.DataFrame],
+                           merge_keys: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Validate and load extracted chunks as they arrive, then log metadata.
+
+    Peak memory is bounded by the chunk size rather than the table size. With
+    merge_keys the rows are merged into the table instead of replacing it.
+    """
+    validation = StreamingValidation(data_source, table_name, environment, pipeline_level)
+
+    # Steps 2 and 3: each chunk is validated on its way into the chunked load
+    logger.info(f"Streaming {data_source}.{table_name} through validation into BigQuery")
+    load_result = load_batches_to_bigquery(
+        batches=validation.observe(batches),
+        data_source=data_source,
+        table_name=table_name,
+        environment=environment,
+        pipeline_level=pipeline_level,
+        validation_results=validation.result,
+        unique_checks=validation.unique_columns,
+        merge_keys=merge_keys,
+        order_column=WATERMARK_COLUMN
+    )
+
+    if not load_result.get("success"):
+        return {
+            "success": False,
+            "error": f"BigQuery load failed: {load_result.get('error')}"
+        }
+
+    # Step 4: Log monitoring metadata
+    validation_result = validation.result()
+    logger.info(f"Logging metadata for {data_source}.{table_name}")
+    log_metadata(
+        data_source=data_source,
+        table_name=table_name,
+        environment=environment,
+        pipeline_level=pipeline_level,
+        validation_results=validation_result,
+        load_results=load_result
+    )
+
+    return {
+        "success": True,
+        "message": f"Pipeline completed for {data_source}.{table_name}",
+        "rows_processed": validation_result.get("total_rows", 0),
+        "chunks": load_result.get("chunks", 0),
+        "validation_passed": validation_result.get("success", False),
+        "data_quality_score": validation_result.get("data_quality_score", 0)
+    }
+
+def incremental_keys(data_source: str, table_name: str, params: Dict[str, Any],
+                     supports_incremental: bool = False) -> Optional[List[str]]:
+    """
+    Key columns to merge an incremental load on, or None to run a full load.
+
+    supports_incremental is the extractor's SUPPORTS_INCREMENTAL flag.
+
+    The key is the message's key_columns (list or comma separated string), else
+    the first compound-unique group or unique column in the table's expectations.
+    """
+    if not INCREMENTAL_LOADS or str(params.get("full_refresh", "false")).lower() == "true":
+        return None
+    if any(key in params for key in FILTER_KEYS):
+        return None
+    if not supports_incremental:
+        logger.warning(f"INCREMENTAL_LOADS is set but the extractor cannot filter on {WATERMARK_COLUMN}; "
+                       f"running a full load of {data_source}.{table_name}")
+        return None
+
+    keys = params.get("key_columns")
+    if isinstance(keys, str):
+        keys = [column.strip() for column in keys.split(",") if column.strip()]
+    if not keys:
+        config = load_expectations_config(data_source, table_name)
+        groups = config.get("expect_compound_columns_to_be_unique") or [
+            [column] for column in config.get("expect_column_values_to_be_unique", [])
+        ]
+        keys = list(groups[0]) if groups else None
+    if not keys:
+        logger.warning(f"No key columns for {data_source}.{table_name}; running a full load")
+        return None
+    return list(keys)
+
+def column_max(data: pd.DataFrame, column: str = WATERMARK_COLUMN) -> Any:
+    """Largest non-null value of the column, or None if it is missing or empty."""
+    if column not in data.columns:
+        return None
+    values = data[column].dropna()
+    return values.max() if not values.empty else None
+
+def track_column_max(batches: Iterable[pd.DataFrame], state: Dict[str, Any],
+                     column: str = WATERMARK_COLUMN) -> Iterator[pd.DataFrame]:
+    """Yield batches unchanged while keeping the column's running max in state["max"]."""
+    for batch in batches:
+        value = column_max(batch, column)
+        if value is not None and (state.get("max") is None or value > state["max"]):
+            state["max"] = value
+        yield batch
+
+def advance_watermark(data_source: str, table_name: str, environment: str,
+                      previous: Optional[str], high_water: Any) -> Optional[str]:
+    """
+    Store the new watermark after a successful load.
+
+    Both values are compared as UTC datetimes and stored in normalized ISO form.
+    A failure here is logged rather than raised: the rows are already merged,
+    and the next run simply re-reads them from the old watermark.
+
+    Returns:
+        The watermark now in effect
+    """
+    if high_water is None:
+        return previous
+    value = to_watermark(high_water)
+    if previous and value <= to_watermark(previous):
+        return previous
+    value = value.isoformat()
+    try:
+        get_watermark_store().set(data_source, table_name, environment, value)
+        logger.info(f"Advanced {data_source}.{table_name} ({environment}) watermark to {value}")
+        return value
+    except Exception as e:
+        logger.error(f"Could not store watermark for {data_source}.{table_name}: {e}")
+        return previous
+
 def decode_pubsub_message(envelope: Dict[str, Any]) -> Dict[str, Any]:
     """Decode Pub/Sub message from envelope."""
     try:
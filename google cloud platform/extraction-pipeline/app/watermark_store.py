@@ -0,0 +1,153 @@
+# ==============================================================================
+# watermark_store.py
+# Per (source, table, environment) high-water marks for incremental extraction.
+# ==============================================================================
+
+import os
+import sqlite3
+import threading
+import logging
+import pandas as pd
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# "bigquery" keeps watermarks in the metadata dataset (prod); "sqlite" in a local file (tests)
+WATERMARK_BACKEND = os.getenv("WATERMARK_BACKEND", "bigquery")
+WATERMARK_SQLITE_PATH = os.getenv("WATERMARK_SQLITE_PATH", "/tmp/watermarks.sqlite")
+
+# Column compared against last_modified_since by the query builders
+WATERMARK_COLUMN = "last_modified"
+
+
+def to_watermark(value: Any) -> datetime:
+    """
+    Parse a column value or stored watermark as a naive UTC datetime.
+
+    Sources return datetimes, pandas Timestamps or strings in assorted ISO forms
+    ("2024-01-05", "2024-01-05 10:00:00", "...+01:00"), which do not order
+    correctly as strings; watermarks are only compared after this.
+    """
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+    return timestamp.to_pydatetime()
+
+
+class WatermarkStore(ABC):
+    """Interface for watermark backends; values are naive UTC ISO-8601 strings (see to_watermark)."""
+
+    @abstractmethod
+    def get(self, data_source: str, table_name: str, environment: str) -> Optional[str]:
+        """Stored watermark, or None before the first incremental load."""
+
+    @abstractmethod
+    def set(self, data_source: str, table_name: str, environment: str, watermark: str):
+        """Store the watermark, replacing any previous one."""
+
+
+class SQLiteWatermarkStore(WatermarkStore):
+    """Watermarks in a local SQLite file."""
+
+    def __init__(self, path: str = WATERMARK_SQLITE_PATH):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS watermarks (
+                data_source TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                environment TEXT NOT NULL,
+                watermark TEXT NOT NULL,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (data_source, table_name, environment)
+            )
+        """)
+        self.db.commit()
+
+    def get(self, data_source: str, table_name: str, environment: str) -> Optional[str]:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT watermark FROM watermarks WHERE data_source = ? AND table_name = ? AND environment = ?",
+                (data_source, table_name, environment)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, data_source: str, table_name: str, environment: str, watermark: str):
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO watermarks (data_source, table_name, environment, watermark) "
+                "VALUES (?, ?, ?, ?)",
+                (data_source, table_name, environment, watermark)
+            )
+            self.db.commit()
+
+
+class BigQueryWatermarkStore(WatermarkStore):
+    """Watermarks in a table of the metadata dataset, updated with MERGE."""
+
+    def __init__(self, table_id: Optional[str] = None):
+        from google.cloud import bigquery
+        from bigquery_utils import PROJECT_ID, METADATA_DATASET, ensure_metadata_table_exists, get_bigquery_client
+
+        self.bigquery = bigquery
+        self.client = get_bigquery_client()
+        self.table_id = table_id or f"{PROJECT_ID}.{METADATA_DATASET}.watermarks"
+        ensure_metadata_table_exists(self.client, self.table_id, [
+            bigquery.SchemaField("data_source", "STRING", mode="REQUIRED"),
+            bigquery.SchemaField("table_name", "STRING", mode="REQUIRED"),
+            bigquery.SchemaField("environment", "STRING", mode="REQUIRED"),
+            bigquery.SchemaField("watermark", "STRING", mode="REQUIRED"),
+            bigquery.SchemaField("updated_at", "TIMESTAMP", mode="REQUIRED"),
+        ])
+
+    def _params(self, data_source: str, table_name: str, environment: str, **extra):
+        values = {"data_source": data_source, "table_name": table_name, "environment": environment, **extra}
+        return self.bigquery.QueryJobConfig(query_parameters=[
+            self.bigquery.ScalarQueryParameter(name, "STRING", value) for name, value in values.items()
+        ])
+
+    def get(self, data_source: str, table_name: str, environment: str) -> Optional[str]:
+        rows = list(self.client.query(
+            f"""
+            SELECT watermark FROM `{self.table_id}`
+            WHERE data_source = @data_source AND table_name = @table_name AND environment = @environment
+            """,
+            job_config=self._params(data_source, table_name, environment)
+        ).result())
+        return rows[0].watermark if rows else None
+
+    def set(self, data_source: str, table_name: str, environment: str, watermark: str):
+        self.client.query(
+            f"""
+            MERGE `{self.table_id}` AS t
+            USING (SELECT @data_source AS data_source, @table_name AS table_name,
+                          @environment AS environment, @watermark AS watermark) AS s
+            ON t.data_source = s.data_source AND t.table_name = s.table_name AND t.environment = s.environment
+            WHEN MATCHED THEN
+                UPDATE SET watermark = s.watermark, updated_at = CURRENT_TIMESTAMP()
+            WHEN NOT MATCHED THEN
+                INSERT (data_source, table_name, environment, watermark, updated_at)
+                VALUES (s.data_source, s.table_name, s.environment, s.watermark, CURRENT_TIMESTAMP())
+            """,
+            job_config=self._params(data_source, table_name, environment, watermark=watermark)
+        ).result()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_watermark_store() -> WatermarkStore:
+    """Process-wide store for the backend named by WATERMARK_BACKEND."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if WATERMARK_BACKEND == "sqlite":
+                _store = SQLiteWatermarkStore()
+            elif WATERMARK_BACKEND == "bigquery":
+                _store = BigQueryWatermarkStore()
+            else:
+                raise ValueError(f"Unknown WATERMARK_BACKEND: {WATERMARK_BACKEND}")
+        return _store
@@ -0,0 +1,126 @@
+# ==============================================================================
+# bench_query_builder.py
+# Legacy SELECT * with literals vs the projected, parameterized query.
+#   source_DB_URL=mssql+pyodbc://... python benchmarks/bench_query_builder.py --table dbo.cars \
+#       --columns car_id,brand,price --dates 30
+# Reports query latency over a run of distinct start_date values. On SQL Server it
+# also reports, per builder:
+#   compile_ms   parse and compile time from SET STATISTICS TIME; the legacy builder
+#                compiles once per distinct date, the parameterized one once
+#   wire_kb      TDS packets the server sent for the results (sys.dm_exec_connections
+#                num_writes x net_packet_size; the last packet of each result is
+#                usually partial, so this slightly overstates)
+#   new_cached_plans  plans added to the cache for the table
+# On other databases wire_kb falls back to the DataFrame size and compile_ms is None.
+# ==============================================================================
+
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+from datetime import date, timedelta
+
+import pandas as pd
+import sqlalchemy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from extract_db import (  # noqa: E402
+    build_parameterized_query, build_source_query, default_columns, get_engine, to_statement,
+)
+
+PLAN_COUNT_QUERY = sqlalchemy.text("""
+    SELECT COUNT(*)
+    FROM sys.dm_exec_cached_plans AS cp
+    CROSS APPLY sys.dm_exec_sql_text(cp.plan_handle) AS st
+    WHERE st.text LIKE :pattern AND st.text NOT LIKE '%dm_exec_cached_plans%'
+""")
+
+CONNECTION_STATS_QUERY = sqlalchemy.text(
+    "SELECT num_writes, net_packet_size FROM sys.dm_exec_connections WHERE session_id = @@SPID"
+)
+
+COMPILE_TIME = re.compile(r"parse and compile time:\s*CPU time = \d+ ms, elapsed time = (\d+) ms")
+
+
+def cached_plans(engine, table: str):
+    if engine.dialect.name != "mssql":
+        return None
+    with engine.connect() as connection:
+        return connection.execute(PLAN_COUNT_QUERY, {"pattern": f"%FROM {table}%"}).scalar()
+
+
+def timed_query(connection, query: str, params: dict, mssql: bool):
+    """Run one query; returns (DataFrame, seconds, compile ms or None, bytes sent to the client)."""
+    if mssql:
+        connection.exec_driver_sql("SET STATISTICS TIME ON")
+        writes_before, packet_size = connection.execute(CONNECTION_STATS_QUERY).one()
+
+    start = time.perf_counter()
+    result = connection.execute(to_statement(query, params), params)
+    # pyodbc collects the informational messages sent ahead of the first result set
+    messages = getattr(result.cursor, "messages", None) or []
+    df = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+    elapsed = time.perf_counter() - start
+
+    if not mssql:
+        return df, elapsed, None, int(df.memory_usage(deep=True, index=False).sum())
+
+    connection.exec_driver_sql("SET STATISTICS TIME OFF")
+    writes_after, _ = connection.execute(CONNECTION_STATS_QUERY).one()
+    compile_ms = sum(int(match.group(1)) for _, text in messages for match in COMPILE_TIME.finditer(str(text)))
+    # one of the packets counted is the reply to the first stats query, one the SET reply
+    packets = max(0, writes_after - writes_before - 2)
+    return df, elapsed, compile_ms, packets * packet_size
+
+
+def run(engine, table: str, columns, start_dates, builder: str) -> dict:
+    mssql = engine.dialect.name == "mssql"
+    plans_before = cached_plans(engine, table)
+    timings, compile_ms, wire_bytes, rows = [], [], 0, 0
+    for start_date in start_dates:
+        if builder == "legacy":
+            query, params = build_source_query(table, start_date=start_date), {}
+        else:
+            query, params = build_parameterized_query(table, columns, engine.dialect, start_date=start_date)
+        with engine.connect() as connection:
+            df, elapsed, compiled, sent = timed_query(connection, query, params, mssql)
+        timings.append(elapsed)
+        if compiled is not None:
+            compile_ms.append(compiled)
+        wire_bytes += sent
+        rows += len(df)
+    plans_after = cached_plans(engine, table)
+    return {
+        "builder": builder,
+        "queries": len(start_dates),
+        "rows": rows,
+        "wire_kb": round(wire_bytes / 1024, 1),
+        "compile_ms": sum(compile_ms) if compile_ms else None,
+        "first_ms": round(timings[0] * 1000, 2),
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+        "new_cached_plans": None if plans_before is None else plans_after - plans_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--table", required=True)
+    parser.add_argument("--columns", help="comma separated; defaults to the expectations config")
+    parser.add_argument("--dates", type=int, default=30, help="distinct start_date values to query")
+    parser.add_argument("--start", default=(date.today() - timedelta(days=60)).isoformat())
+    args = parser.parse_args()
+
+    engine = get_engine()
+    columns = args.columns.split(",") if args.columns else default_columns(args.table)
+    first = date.fromisoformat(args.start)
+    start_dates = [(first + timedelta(days=i)).isoformat() for i in range(args.dates)]
+
+    for builder in ("legacy", "parameterized"):
+        print(run(engine, args.table, columns, start_dates, builder))
+
+
+if __name__ == "__main__":
+    main()
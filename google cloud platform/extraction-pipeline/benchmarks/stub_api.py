@@ -0,0 +1,106 @@
+# ==============================================================================
+# stub_api.py
+# Local paginating HTTP API for exercising extract_api.
+#   python benchmarks/stub_api.py --rows 25000 --port 8765 --latency 0.05 --throttle-every 7
+# The table name picks the pagination style:
+# GET /offset_<name>?offset=&limit=  offset/limit pages
+# GET /cursor_<name>?cursor=&limit=  {"data": [...], "next_cursor": "..."}
+# GET /link_<name>?limit=            array pages with a rel="next" Link header
+# GET /<anything else>               the whole table in one response
+# Every Nth request gets 429 with Retry-After to exercise the backoff.
+# ==============================================================================
+
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def make_rows(count: int) -> list:
+    return [{"id": i, "name": f"row {i}", "amount": round(i * 1.5, 2), "last_modified": f"2024-01-{i % 28 + 1:02d}"}
+            for i in range(count)]
+
+
+def make_handler(rows: list, latency: float, throttle_every: int):
+    counter = {"requests": 0, "throttled": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                counter["requests"] += 1
+                throttle = throttle_every and counter["requests"] % throttle_every == 0
+                if throttle:
+                    counter["throttled"] += 1
+            if throttle:
+                self.send_response(429)
+                self.send_header("Retry-After", "0.2")
+                self.end_headers()
+                return
+
+            time.sleep(latency)
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            limit = int(query.get("limit", len(rows) or 1))
+            headers = {}
+
+            style = url.path.strip("/").split("_")[0]
+            if style == "offset":
+                offset = int(query.get("offset", 0))
+                body = {"data": rows[offset:offset + limit]}
+            elif style == "cursor":
+                start = int(query.get("cursor") or 0)
+                end = start + limit
+                body = {"data": rows[start:end], "next_cursor": str(end) if end < len(rows) else None}
+            elif style == "link":
+                page = int(query.get("page", 0))
+                body = rows[page * limit:(page + 1) * limit]
+                if (page + 1) * limit < len(rows):
+                    next_url = f"http://{self.headers['Host']}{url.path}?page={page + 1}&limit={limit}"
+                    headers["Link"] = f'<{next_url}>; rel="next"'
+            else:
+                body = {"data": rows}
+
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler, counter
+
+
+def serve(rows: int = 25000, port: int = 8765, latency: float = 0.0, throttle_every: int = 0):
+    """Start the stub in a background thread; returns (server, request counter)."""
+    handler, counter = make_handler(make_rows(rows), latency, throttle_every)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counter
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=25000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--throttle-every", type=int, default=0, help="answer every Nth request with 429")
+    args = parser.parse_args()
+    server, _ = serve(args.rows, args.port, args.latency, args.throttle_every)
+    print(f"Serving {args.rows} rows on http://127.0.0.1:{args.port}/<table>")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+from google.api_core.exceptions import NotFound
+from google.cloud import bigquery
+
+import bigquery_utils
+
+
+class RecordingClient:
+    """Client stand-in that knows which tables exist and records the queries it runs."""
+
+    def __init__(self, tables=()):
+        self.tables = set(tables)
+        self.queries = []
+
+    def get_table(self, table_id):
+        if table_id not in self.tables:
+            raise NotFound(table_id)
+        return bigquery.Table(table_id)
+
+    def query(self, sql, job_config=None):
+        self.queries.append(sql)
+        return self
+
+    def result(self):
+        return []
+
+    def delete_table(self, table_id, not_found_ok=False):
+        self.tables.discard(table_id)
+
+
+def load(client, monkeypatch, **kwargs):
+    monkeypatch.setattr(bigquery_utils, "get_bigquery_client", lambda: client)
+    return bigquery_utils.load_batches_to_bigquery(
+        iter([pd.DataFrame()]), "source", "orders", "dev", "raw",
+        validation_results=lambda counts: {"success": True}, **kwargs)
+
+
+def target_id():
+    return f"{bigquery_utils.PROJECT_ID}.{bigquery_utils.DATASET_MAPPING['dev']}.source_orders_raw"
+
+
+def test_empty_full_load_truncates_the_target(monkeypatch):
+    client = RecordingClient([target_id()])
+
+    result = load(client, monkeypatch)
+
+    assert result["success"] and result["rows_loaded"] == 0
+    assert client.queries == [f"TRUNCATE TABLE `{target_id()}`"]
+
+
+def test_empty_full_load_without_a_target_creates_nothing(monkeypatch):
+    client = RecordingClient()
+
+    assert load(client, monkeypatch)["success"]
+    assert client.queries == []
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"write_disposition": bigquery.WriteDisposition.WRITE_APPEND},
+    {"merge_keys": ["id"]},
+])
+def test_empty_delta_leaves_the_target_alone(monkeypatch, kwargs):
+    client = RecordingClient([target_id()])
+
+    assert load(client, monkeypatch, **kwargs)["success"]
+    assert client.queries == []
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+import main
+from dedup import DedupCache, DONE, IN_FLIGHT
+
+
+def push(client, message_id="m-1"):
+    return client.post("/", json={"message": {"messageId": message_id, "data": ""}})
+
+
+@pytest.fixture
+def client(monkeypatch):
+    cache = DedupCache(sqlite_path=None)
+    monkeypatch.setattr(main, "get_dedup_cache", lambda: cache)
+    monkeypatch.setattr(main, "ASYNC_ACK", False)
+    return main.app.test_client()
+
+
+def test_begin_reports_earlier_state():
+    cache = DedupCache(sqlite_path=None)
+
+    assert cache.begin("m-1") is None
+    assert cache.begin("m-1") == IN_FLIGHT
+    cache.finish("m-1", True)
+    assert cache.begin("m-1") == DONE
+
+
+def test_failed_message_is_retried():
+    cache = DedupCache(sqlite_path=None)
+
+    cache.begin("m-1")
+    cache.finish("m-1", False)
+
+    assert cache.begin("m-1") is None
+
+
+def test_redelivery_of_finished_message_is_acked(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "handle_pubsub_message", lambda *args: calls.append(args) or {"success": True})
+
+    assert push(client).status_code == 200
+    response = push(client)
+
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).startswith("Duplicate")
+    assert len(calls) == 1
+
+
+def test_redelivery_while_in_flight_is_not_acked(client, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_pipeline(*args):
+        started.set()
+        release.wait(5)
+        return {"success": True}
+
+    monkeypatch.setattr(main, "handle_pubsub_message", slow_pipeline)
+    first = threading.Thread(target=push, args=(client,))
+    first.start()
+    started.wait(5)
+
+    assert push(client).status_code == 409
+
+    release.set()
+    first.join()
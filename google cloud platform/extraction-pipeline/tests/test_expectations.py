@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+import ge_runner
+from extract_db import default_columns, build_parameterized_query
+
+GX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gx")
+
+
+@pytest.fixture(autouse=True)
+def shipped_suites(monkeypatch):
+    monkeypatch.setattr(ge_runner, "GX_DIR", GX_DIR)
+    ge_runner.read_expectations_file.cache_clear()
+    ge_runner.read_expectation_suite.cache_clear()
+    yield
+    ge_runner.read_expectations_file.cache_clear()
+    ge_runner.read_expectation_suite.cache_clear()
+
+
+def test_suite_file_is_converted():
+    config = ge_runner.load_expectations_config("source", "table")
+
+    assert config["expect_columns_to_match_set"]["column_set"] == ["car_id", "brand", "model", "year", "price", "created_at"]
+    assert config["expect_column_values_to_be_unique"] == ["car_id"]
+    assert config["expect_column_values_to_not_be_null"] == ["brand", "model"]
+    assert config["expect_column_values_to_be_between"]["year"] == {"min_value": 1990, "max_value": 2025}
+    assert ge_runner.list_configured_tables("source") == ["table"]
+
+
+def test_suite_columns_drive_the_projection():
+    columns = default_columns("table")
+    query, _ = build_parameterized_query("table", columns)
+
+    assert query.startswith("SELECT car_id, brand, model, year, price, created_at FROM table")
+    assert default_columns("missing") is None
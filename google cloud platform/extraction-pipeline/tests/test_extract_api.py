@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+
+import extract_api
+from stub_api import serve
+
+ROWS = 250
+PAGE_SIZE = 100
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Stub API on a free port, answering every 2nd request with 429."""
+    server, counter = serve(rows=ROWS, port=0, throttle_every=2)
+    monkeypatch.setenv("source_API_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setenv("source_API_KEY", "stub")
+    monkeypatch.setattr(extract_api, "BACKOFF_SECONDS", 0.01)
+    yield counter
+    server.shutdown()
+    server.server_close()
+
+
+def extract(table_name, **kwargs):
+    result = extract_api.extract_source_data(table_name, "dev", page_size=PAGE_SIZE, **kwargs)
+    if result.get("streaming"):
+        result["data"] = pd.concat(list(result["batches"]), ignore_index=True)
+    return result
+
+
+@pytest.mark.parametrize("stream", [False, True])
+@pytest.mark.parametrize("pagination", ["none", "offset", "cursor", "link"])
+def test_extracts_every_row(stub, pagination, stream):
+    result = extract(f"{pagination}_orders", pagination=pagination, stream=stream, batch_rows=60)
+
+    assert result["success"], result.get("error")
+    assert result["data"]["id"].tolist() == list(range(ROWS))
+    assert stub["throttled"] > 0 or pagination == "none"
+
+
+@pytest.mark.parametrize("pagination", ["offset", "cursor", "link"])
+def test_page_limit_fails_buffered_extraction(stub, monkeypatch, pagination):
+    monkeypatch.setattr(extract_api, "MAX_PAGES", 2)
+
+    result = extract(f"{pagination}_orders", pagination=pagination)
+
+    assert not result["success"]
+    assert "more than 2 pages" in result["error"]
+
+
+@pytest.mark.parametrize("pagination", ["offset", "cursor", "link"])
+def test_page_limit_fails_streamed_extraction(stub, monkeypatch, pagination):
+    monkeypatch.setattr(extract_api, "MAX_PAGES", 2)
+
+    with pytest.raises(RuntimeError, match="more than 2 pages"):
+        extract(f"{pagination}_orders", pagination=pagination, stream=True)
+
+
+def test_page_limit_not_hit_on_last_page(stub, monkeypatch):
+    monkeypatch.setattr(extract_api, "MAX_PAGES", 3)
+
+    result = extract("link_orders", pagination="link")
+
+    assert result["success"], result.get("error")
+    assert len(result["data"]) == ROWS
+
+
+def test_streaming_refused_without_ijson(stub, monkeypatch):
+    monkeypatch.setattr(extract_api, "ijson", None)
+
+    result = extract("offset_orders", pagination="offset", stream=True)
+
+    assert not result["success"]
+    assert "ijson" in result["error"]
+
+
+@pytest.mark.parametrize("pagination", ["offset", "cursor", "link"])
+def test_streamed_records_arrive_before_later_pages_are_fetched(stub, pagination):
+    result = extract_api.extract_source_data(f"{pagination}_orders", "dev", page_size=PAGE_SIZE,
+                                             pagination=pagination, stream=True, batch_rows=60)
+
+    first = next(result["batches"])
+
+    assert first["id"].tolist() == list(range(60))
+    assert stub["requests"] == 1
+    result["batches"].close()
+
+
+
+def test_connection_pool_fits_requested_concurrency(monkeypatch, caplog):
+    # slow responses keep all 16 requests open at once
+    server, counter = serve(rows=3000, port=0, latency=0.2)
+    monkeypatch.setenv("source_API_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setenv("source_API_KEY", "stub")
+    try:
+        result = extract("offset_orders", pagination="offset", max_concurrency=16)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert result["success"], result.get("error")
+    assert len(result["data"]) == 3000
+    assert not [r for r in caplog.records if "Connection pool is full" in r.getMessage()]
@@ -0,0 +1,24 @@
+import pandas as pd
+import pytest
+import sqlalchemy
+
+from extract_db import fetch_key_slices
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'source.db'}")
+    rows = pd.DataFrame({"order": [*range(10), None], "name": [f"row {i}" for i in range(11)]})
+    rows.to_sql("orders", engine, index=False)
+    yield engine
+    engine.dispose()
+
+
+def test_split_column_is_quoted(engine):
+    # "order" is a reserved word, so it only works as a quoted identifier
+    slices = dict(fetch_key_slices(engine, "orders", "order", ["1 = 1"], {}, parallelism=2, slices=3))
+
+    df = pd.concat([slices[index] for index in sorted(slices)], ignore_index=True)
+    assert len(df) == 11
+    assert df["name"].tolist() == [f"row {i}" for i in range(11)]
+
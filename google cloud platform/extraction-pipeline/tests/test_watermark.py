@@ -0,0 +1,225 @@
+import base64
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pandas as pd
+import sqlalchemy
+import pytest
+
+import extract_db
+import pubsub_handler
+from watermark_store import SQLiteWatermarkStore, to_watermark
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteWatermarkStore(str(tmp_path / "watermarks.sqlite"))
+
+
+def test_sqlite_store_get_and_set(store):
+    assert store.get("source", "orders", "dev") is None
+
+    store.set("source", "orders", "dev", "2024-01-05T00:00:00")
+    store.set("source", "orders", "dev", "2024-01-06T00:00:00")
+
+    assert store.get("source", "orders", "dev") == "2024-01-06T00:00:00"
+    assert store.get("source", "orders", "prod") is None
+
+
+def test_to_watermark_normalizes_to_utc():
+    assert to_watermark("2024-01-05T10:00:00+01:00") == datetime(2024, 1, 5, 9)
+    assert to_watermark(pd.Timestamp("2024-01-05 09:00", tz="UTC")) == datetime(2024, 1, 5, 9)
+    assert to_watermark("2024-01-05") == datetime(2024, 1, 5)
+
+
+class FakePipeline:
+    """Stands in for extraction and BigQuery so run_table_pipeline runs locally."""
+
+    def __init__(self, rows, load_success=True):
+        self.rows = rows
+        self.load_success = load_success
+        self.extract_calls = []
+        self.merge_keys = []
+
+    def extract_data(self, data_source, table_name, environment, **params):
+        self.extract_calls.append(params)
+        return {"success": True, "data": pd.DataFrame(self.rows)}
+
+    def load_to_bigquery(self, data, **kwargs):
+        return {"success": self.load_success, "error": None if self.load_success else "load failed"}
+
+    def load_batches_to_bigquery(self, batches, validation_results, merge_keys=None, **kwargs):
+        for _ in batches:
+            pass
+        validation_results({"rows": 0, "unique": {}})
+        self.merge_keys.append(merge_keys)
+        return {"success": self.load_success, "error": None if self.load_success else "load failed"}
+
+
+@pytest.fixture
+def pipeline(monkeypatch, store):
+    def install(rows, load_success=True):
+        fake = FakePipeline(rows, load_success)
+        monkeypatch.setattr(pubsub_handler, "INCREMENTAL_LOADS", True)
+        monkeypatch.setattr(pubsub_handler, "get_watermark_store", lambda: store)
+        monkeypatch.setattr(pubsub_handler, "get_extractor",
+                            lambda name: SimpleNamespace(extract_data=fake.extract_data, SUPPORTS_INCREMENTAL=True))
+        monkeypatch.setattr(pubsub_handler, "load_to_bigquery", fake.load_to_bigquery)
+        monkeypatch.setattr(pubsub_handler, "load_batches_to_bigquery", fake.load_batches_to_bigquery)
+        monkeypatch.setattr(pubsub_handler, "log_metadata", lambda **kwargs: None)
+        return fake
+    return install
+
+
+def run(params=None):
+    return pubsub_handler.run_table_pipeline("source", "orders", "dev", "bronze", {"key_columns": "id", **(params or {})})
+
+
+def test_watermark_advances_after_successful_load(pipeline, store):
+    fake = pipeline([{"id": 1, "last_modified": "2024-01-05 10:00:00"},
+                     {"id": 2, "last_modified": "2024-01-04T23:00:00"}])
+
+    result = run()
+
+    assert result["success"], result.get("error")
+    assert "last_modified_since" not in fake.extract_calls[0]
+    assert store.get("source", "orders", "dev") == "2024-01-05T10:00:00"
+
+
+def test_delta_is_read_inclusively_and_merged(pipeline, store):
+    store.set("source", "orders", "dev", "2024-01-05T10:00:00")
+    fake = pipeline([{"id": 1, "last_modified": "2024-01-05 10:00:00"},
+                     {"id": 3, "last_modified": "2024-01-05 11:30:00"}])
+
+    result = run()
+
+    assert result["success"], result.get("error")
+    assert fake.extract_calls[0]["last_modified_since"] == datetime(2024, 1, 5, 10)
+    assert fake.merge_keys == [["id"]]
+    assert store.get("source", "orders", "dev") == "2024-01-05T11:30:00"
+
+
+def test_watermark_compares_as_datetimes(pipeline, store):
+    # As strings "2024-01-05 11:00:00" < "2024-01-05T10:00:00", so it would never advance
+    store.set("source", "orders", "dev", "2024-01-05T10:00:00")
+    pipeline([{"id": 1, "last_modified": "2024-01-05 11:00:00"}])
+
+    assert run()["success"]
+    assert store.get("source", "orders", "dev") == "2024-01-05T11:00:00"
+
+
+def test_watermark_does_not_move_backwards(pipeline, store):
+    store.set("source", "orders", "dev", "2024-01-05T12:00:00")
+    pipeline([{"id": 1, "last_modified": "2024-01-05T12:30:00+01:00"}])
+
+    assert run()["success"]
+    assert store.get("source", "orders", "dev") == "2024-01-05T12:00:00"
+
+
+@pytest.mark.parametrize("stored", [None, "2024-01-01T00:00:00"])
+def test_watermark_unchanged_when_load_fails(pipeline, store, stored):
+    if stored:
+        store.set("source", "orders", "dev", stored)
+    pipeline([{"id": 1, "last_modified": "2024-01-05 10:00:00"}], load_success=False)
+
+    result = run()
+
+    assert not result["success"]
+    assert store.get("source", "orders", "dev") == stored
+
+
+def test_full_load_without_key(pipeline, store):
+    fake = pipeline([{"id": 1, "last_modified": "2024-01-05 10:00:00"}])
+    store.set("source", "orders", "dev", "2024-01-01T00:00:00")
+
+    result = pubsub_handler.run_table_pipeline("source", "orders", "dev", "bronze", {})
+
+    assert result["success"], result.get("error")
+    assert "last_modified_since" not in fake.extract_calls[0]
+    assert store.get("source", "orders", "dev") == "2024-01-01T00:00:00"
+
+
+class MergingTarget:
+    """BigQuery stand-in holding the target table as rows by id, so merges can be checked."""
+
+    def __init__(self):
+        self.rows = {}
+        self.loads = []
+
+    def load_to_bigquery(self, data, **kwargs):
+        self.rows = {row["id"]: row for row in data.to_dict("records")}
+        self.loads.append(("replace", len(data)))
+        return {"success": True}
+
+    def load_batches_to_bigquery(self, batches, validation_results, merge_keys=None, **kwargs):
+        data = pd.concat(list(batches), ignore_index=True)
+        validation_results({"rows": 0, "unique": {}})
+        assert merge_keys == ["id"]
+        self.rows.update({row["id"]: row for row in data.to_dict("records")})
+        self.loads.append(("merge", len(data)))
+        return {"success": True, "chunks": 1}
+
+
+def push(extractor=None):
+    message = {"table_name": "orders", "environment": "dev", "key_columns": "id"}
+    if extractor:
+        message["extractor"] = extractor
+    return {"message": {"data": base64.b64encode(json.dumps(message).encode()).decode()}}
+
+
+def test_incremental_load_through_db_extractor(monkeypatch, store, tmp_path):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'source.db'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE orders (id INTEGER, amount REAL, last_modified TEXT)")
+        connection.exec_driver_sql("INSERT INTO orders VALUES (1, 10, '2024-01-05 10:00:00'), "
+                                   "(2, 20, '2024-01-04 09:00:00')")
+    target = MergingTarget()
+    monkeypatch.setenv("source_DB_URL", str(engine.url))
+    monkeypatch.setattr(pubsub_handler, "INCREMENTAL_LOADS", True)
+    monkeypatch.setattr(pubsub_handler, "get_watermark_store", lambda: store)
+    monkeypatch.setattr(pubsub_handler, "load_to_bigquery", target.load_to_bigquery)
+    monkeypatch.setattr(pubsub_handler, "load_batches_to_bigquery", target.load_batches_to_bigquery)
+    monkeypatch.setattr(pubsub_handler, "log_metadata", lambda **kwargs: None)
+
+    first = pubsub_handler.handle_pubsub_message(push("db"), "source")
+
+    assert first["success"], first.get("error")
+    assert first["watermark"] == "2024-01-05T10:00:00"
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE orders SET amount = 11, last_modified = '2024-01-06 08:00:00' WHERE id = 1")
+        connection.exec_driver_sql("INSERT INTO orders VALUES (3, 30, '2024-01-06 09:00:00')")
+
+    second = pubsub_handler.handle_pubsub_message(push("db"), "source")
+
+    assert second["success"], second.get("error")
+    assert target.loads == [("replace", 2), ("merge", 2)]
+    assert {id: row["amount"] for id, row in target.rows.items()} == {1: 11, 2: 20, 3: 30}
+    assert store.get("source", "orders", "dev") == "2024-01-06T09:00:00"
+    extract_db.dispose_engines()
+    engine.dispose()
+
+
+def test_api_extractor_runs_full_loads(monkeypatch, store):
+    extract_calls = []
+    monkeypatch.setattr(pubsub_handler, "INCREMENTAL_LOADS", True)
+    monkeypatch.setattr(pubsub_handler, "get_watermark_store", lambda: store)
+    monkeypatch.setattr("extract_api.extract_data", lambda **kwargs: extract_calls.append(kwargs) or {
+        "success": True, "data": pd.DataFrame([{"id": 1, "last_modified": "2024-01-05"}])})
+    monkeypatch.setattr(pubsub_handler, "load_to_bigquery", lambda data, **kwargs: {"success": True})
+    monkeypatch.setattr(pubsub_handler, "log_metadata", lambda **kwargs: None)
+    store.set("source", "orders", "dev", "2024-01-01T00:00:00")
+
+    result = pubsub_handler.handle_pubsub_message(push(), "source")
+
+    assert result["success"], result.get("error")
+    assert "last_modified_since" not in extract_calls[0]
+    assert "watermark" not in result
+
+
+def test_unknown_extractor_fails_the_message(monkeypatch):
+    result = pubsub_handler.handle_pubsub_message(push("ftp"), "source")
+
+    assert not result["success"]
+    assert "Unknown extractor" in result["error"]